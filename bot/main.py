@@ -337,7 +337,10 @@ async def add_category(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         with session_scope() as session:
             site = ensure_site(session, url)
             scraper = ScraperService()
-            snapshots = await scraper.fetch_category(site.parser_adapter, url)
+            try:
+                snapshots = await scraper.fetch_category(site.parser_adapter, url)
+            finally:
+                await scraper.close()
             category = (
                 session.query(Category)
                 .filter_by(site_id=site.id, category_url=url)
@@ -572,6 +575,8 @@ async def perform_recheck(query: MessageEditor, product_id: int) -> None:
             LOGGER.exception("Unexpected error during manual recheck for product %s", product_id)
             await query.edit_message_text(f"Ошибка при проверке товара: {exc}")
             return
+        finally:
+            await service.scraper.close()
         if event and event.payload:
             try:
                 event.payload = json.loads(json.dumps(event.payload, default=_decimal_default))
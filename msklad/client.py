@@ -16,6 +16,7 @@ LOGGER = logging.getLogger(__name__)
 
 _MAX_RETRIES = 5
 _RETRYABLE_STATUSES = {429}
+_NON_SLUG_PATTERN = re.compile(r"[^0-9A-Za-z]+")
 
 
 class MoySkladError(RuntimeError):
@@ -160,7 +161,7 @@ class MoySkladClient:
         raise MoySkladError(message, status_code=status, code=error_code, request_id=request_id)
 
     def _generate_external_code(self, name: str, used_codes: set[str]) -> str:
-        slug = re.sub(r"[^0-9A-Za-z]+", "_", name).strip("_") or "price_type"
+        slug = _NON_SLUG_PATTERN.sub("_", name).strip("_") or "price_type"
         slug = slug[:50]
         candidate = slug
         index = 1
@@ -77,6 +77,10 @@ class Settings(BaseSettings):
 
     playwright_headless: bool = Field(True, description="Run Playwright browser in headless mode.")
     playwright_slow_mo: int = Field(0, description="Optional slow motion delay for Playwright actions.")
+    playwright_debug_dumps: bool = Field(
+        False,
+        description="Save a full-page screenshot and the page HTML when a Playwright scrape finds no price.",
+    )
 
     structlog_json: bool = Field(False, description="Enable JSON output for structlog if true.")
 
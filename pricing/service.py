@@ -185,35 +185,38 @@ async def check_all_products(batch_size: int | None = None) -> List[Dict[str, An
             .all()
         )
         service = PriceMonitorService(session)
-        for product in products:
-            try:
-                event = await service.check_product(product)
-            except PriceNotFoundError as exc:
-                LOGGER.warning(
-                    "Skipping product due to missing price",
-                    extra={"product_id": product.id, "url": product.competitor_url, "reason": str(exc)},
-                )
-                continue
-            except ScraperError as exc:
-                LOGGER.error(
-                    "Failed to check product",
-                    exc_info=exc,
-                    extra={"product_id": product.id, "url": product.competitor_url},
-                )
-                continue
-            if event:
-                session.flush()
-                events.append(
-                    {
-                        "product_id": product.id,
-                        "competitor_url": product.competitor_url,
-                        "product_title": product.title,
-                        "old_price": float(event.old_price) if event.old_price is not None else None,
-                        "new_price": float(event.new_price),
-                        "msklad_codes": [link.msklad_code for link in product.links],
-                        "price_types": [price_type for link in product.links for price_type in link.price_types],
-                    }
-                )
+        try:
+            for product in products:
+                try:
+                    event = await service.check_product(product)
+                except PriceNotFoundError as exc:
+                    LOGGER.warning(
+                        "Skipping product due to missing price",
+                        extra={"product_id": product.id, "url": product.competitor_url, "reason": str(exc)},
+                    )
+                    continue
+                except ScraperError as exc:
+                    LOGGER.error(
+                        "Failed to check product",
+                        exc_info=exc,
+                        extra={"product_id": product.id, "url": product.competitor_url},
+                    )
+                    continue
+                if event:
+                    session.flush()
+                    events.append(
+                        {
+                            "product_id": product.id,
+                            "competitor_url": product.competitor_url,
+                            "product_title": product.title,
+                            "old_price": float(event.old_price) if event.old_price is not None else None,
+                            "new_price": float(event.new_price),
+                            "msklad_codes": [link.msklad_code for link in product.links],
+                            "price_types": [price_type for link in product.links for price_type in link.price_types],
+                        }
+                    )
+        finally:
+            await service.scraper.close()
         session.flush()
     return events
 
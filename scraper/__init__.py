@@ -49,7 +49,14 @@ class ScraperService:
         urls: Iterable[str],
         *,
         concurrency: Optional[int] = None,
-    ) -> List[ProductSnapshot]:
+        return_exceptions: bool = False,
+    ) -> List[ProductSnapshot | BaseException]:
+        """Fetch several products with at most ``concurrency`` in flight.
+
+        With ``return_exceptions`` a failed URL leaves its exception in place
+        instead of aborting the whole batch.
+        """
+
         parser = await self._get_parser(adapter_name)
         semaphore = asyncio.Semaphore(concurrency or settings.max_concurrent_requests)
 
@@ -57,7 +64,40 @@ class ScraperService:
             async with semaphore:
                 return await parser.fetch_product(u)
 
-        return await asyncio.gather(*[_fetch(url) for url in urls])
+        return await asyncio.gather(*[_fetch(url) for url in urls], return_exceptions=return_exceptions)
+
+    async def fetch_categories_parallel(
+        self,
+        adapter_name: str,
+        urls: Iterable[str],
+        *,
+        concurrency: Optional[int] = None,
+        return_exceptions: bool = False,
+    ) -> List[List[ProductSnapshot] | BaseException]:
+        """Fetch several category pages with at most ``concurrency`` in flight.
+
+        The default is ``settings.max_concurrent_requests``; rate-limited
+        responses back off inside the parser's ``fetch_html``.
+        """
+
+        parser = await self._get_parser(adapter_name)
+        semaphore = asyncio.Semaphore(concurrency or settings.max_concurrent_requests)
+
+        async def _fetch(u: str) -> List[ProductSnapshot]:
+            async with semaphore:
+                return await parser.fetch_category(u)
+
+        return await asyncio.gather(*[_fetch(url) for url in urls], return_exceptions=return_exceptions)
+
+    async def close(self) -> None:
+        async with self._lock:
+            parsers = list(self._instances.values())
+            self._instances.clear()
+        for parser in parsers:
+            try:
+                await parser.close()
+            except Exception as exc:  # pragma: no cover - best effort cleanup
+                LOGGER.warning("Parser close failed", error=str(exc))
 
 
 __all__ = ["ScraperService", "ProductSnapshot", "ScraperError", "PriceNotFoundError"]
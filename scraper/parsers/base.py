@@ -10,20 +10,47 @@ import time
 from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional
 from urllib.parse import urlparse
 
 import cloudscraper
+import orjson
 import requests
-from bs4 import BeautifulSoup
 from fake_useragent import UserAgent
+from lxml import etree
+from lxml import html as lxml_html
 
 from pricing.config import settings
 
 LOGGER = logging.getLogger(__name__)
 
-_WS_CLASS = "\u00A0\u2007\u202F\u2009" + r"\s"
+_PRICE_PATTERN = re.compile(r"\d+(?:\.\d{1,2})?")
+_NON_NUMBER_PATTERN = re.compile(r"[^0-9,.]+")
+_CENT = Decimal("0.01")
+_MAX_BACKOFF_SECONDS = 60
+_PW_LAUNCH_ARGS = (os.environ.get("PW_LAUNCH_ARGS") or "").split()
+# Host substring -> selector that marks the price as rendered.
+_PRICE_WAIT_SELECTORS = {
+    "whitehills.ru": "span.price_value",
+    "moscow.petrovich.ru": "[data-test='product-retail-price']",
+    "petrovich.ru": "[data-test='product-retail-price']",
+}
+_BLOCKED_EXTENSIONS = ("png", "jpe?g", "gif", "webp", "svg", "ico", "woff2?", "ttf", "otf", "mp4", "webm")
+_BLOCKED_HOSTS = r"google-analytics|googletagmanager|mc\.yandex|facebook\.com/tr|doubleclick"
+
+
+def _blocked_route_pattern(extensions: tuple[str, ...]) -> re.Pattern[str]:
+    return re.compile(rf"{_BLOCKED_HOSTS}|\.(?:{'|'.join(extensions)})(?:[?#]|$)", re.I)
+
+
+# Images, fonts, media and analytics: nothing a price path needs.
+BLOCKED_ROUTE_PATTERN = _blocked_route_pattern(_BLOCKED_EXTENSIONS)
+# The HTML-only Playwright fetch never checks computed styles, so CSS goes too.
+_HTML_FETCH_ROUTE_PATTERN = _blocked_route_pattern(_BLOCKED_EXTENSIONS + ("css",))
+_HTML_PARSER = lxml_html.HTMLParser(recover=True)
+_SCRIPT_TEXT_XPATH = etree.XPath("//script/text()", smart_strings=False)
 
 
 class ScraperError(RuntimeError):
@@ -39,20 +66,92 @@ def to_decimal(text: str) -> Decimal:
 
     if text is None:
         raise PriceNotFoundError("Price text is empty")
+    # Only strings go through the cache: 1, 1.0 and True are equal keys there
+    # but must keep their own precision (or fail) here.
+    if isinstance(text, str):
+        return _cached_price_decimal(text)
+    return _price_decimal(str(text))
 
-    cleaned = re.sub(rf"[^{_WS_CLASS}0-9.,]", "", str(text))
-    cleaned = re.sub(rf"[{_WS_CLASS}]+", "", cleaned)
-    cleaned = cleaned.replace(",", ".")
 
-    match = re.search(r"^\d+(?:\.\d{1,2})?$", cleaned)
-    if not match:
-        match = re.search(r"\d+(?:\.\d{1,2})?", cleaned)
+def _price_decimal(raw: str) -> Decimal:
+    if _PRICE_PATTERN.fullmatch(raw):
+        # Already clean (typical for JSON values): skip the cleanup passes.
+        return Decimal(raw)
+
+    # Currency marks and every kind of space go in one pass.
+    cleaned = _NON_NUMBER_PATTERN.sub("", raw).replace(",", ".")
+
+    match = _PRICE_PATTERN.fullmatch(cleaned) or _PRICE_PATTERN.search(cleaned)
     if not match:
-        raise PriceNotFoundError(f"Price pattern not found in {text!r}")
+        raise PriceNotFoundError(f"Price pattern not found in {raw!r}")
 
     return Decimal(match.group(0))
 
 
+# Category cards repeat the same few price strings; Decimal results are
+# immutable, so repeats are served from the cache (failures are not cached).
+_cached_price_decimal = lru_cache(maxsize=4096)(_price_decimal)
+
+
+def parse_html(html: str) -> etree._Element | None:
+    """Parse HTML into an lxml tree, or ``None`` for an empty document."""
+
+    try:
+        return lxml_html.fromstring(html, parser=_HTML_PARSER)
+    except etree.ParserError:
+        return None
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        return lxml_html.fromstring(html.encode("utf-8"), parser=_HTML_PARSER)
+
+
+def node_text(node: etree._Element, separator: str = " ") -> str:
+    """Join the stripped, non-empty text fragments of ``node`` (like ``get_text(sep, strip=True)``)."""
+
+    if not len(node):
+        # Leaf nodes (the usual <span class="price_value">2 490</span>) carry
+        # their whole text in .text; skip the itertext walk and the join.
+        return (node.text or "").strip()
+    return separator.join(part for part in (text.strip() for text in node.itertext()) if part)
+
+
+def response_text(response: requests.Response) -> str:
+    """Decode a response body, pinning UTF-8 when the server sent no charset."""
+
+    # The stores all serve UTF-8. Without a charset= parameter requests falls
+    # back to ISO-8859-1 for text/* (mojibake for Cyrillic) and to charset
+    # detection over the whole body otherwise, so both cases are overridden.
+    content_type = response.headers.get("Content-Type") or response.headers.get("content-type") or ""
+    if "charset=" not in content_type.lower():
+        response.encoding = "utf-8"
+    return response.text
+
+
+def class_xpath(*names: str) -> str:
+    """XPath predicate matching elements that carry any of the CSS classes ``names``."""
+
+    return " or ".join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in names
+    )
+
+
+async def _abort_route(route) -> None:  # pragma: no cover - requires browser
+    try:
+        await route.abort()
+    except Exception:
+        pass
+
+
+async def block_heavy_requests(context, pattern: re.Pattern[str] = BLOCKED_ROUTE_PATTERN) -> None:
+    """Abort heavy and analytics requests by URL.
+
+    Playwright matches the pattern in the browser, so requests that pass never
+    make a round-trip into a Python route handler.
+    """
+
+    await context.route(pattern, _abort_route)
+
+
 @dataclass
 class ProductSnapshot:
     """Normalized representation of a product returned by an adapter."""
@@ -74,15 +173,37 @@ class BaseParser:
     """Base class for all site-specific parsers."""
 
     anti_bot_patterns = ("captcha", "cloudflare", "access denied")
+    default_headers = {
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+        "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+        "Cache-Control": "no-cache",
+        "Pragma": "no-cache",
+    }
+
+    # One pooled HTTP session for every parser instance, so keep-alive
+    # connections survive across products and parser objects.
+    _shared_session: Optional[requests.Session] = None
 
     def __init__(self) -> None:
-        self._session = requests.Session()
+        self._session = self._http_session()
         self._scraper = cloudscraper.create_scraper()
         self._user_agent_provider = UserAgent()
+        self._headers: dict[str, str] | None = None
         self._cloudscraper_fallbacks = 0
         self._consecutive_antibot = 0
         self._antibot_dumped = False
 
+    @staticmethod
+    def _http_session() -> requests.Session:
+        if BaseParser._shared_session is None:
+            session = requests.Session()
+            # fetch_html runs in worker threads; size the pool to the batch concurrency.
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(settings.max_concurrent_requests, 10))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            BaseParser._shared_session = session
+        return BaseParser._shared_session
+
     # ------------------------------------------------------------------
     async def fetch_product(self, url: str, *, variant: Optional[str] = None) -> ProductSnapshot:
         """Fetch a single product."""
@@ -94,6 +215,9 @@ class BaseParser:
 
         raise NotImplementedError
 
+    async def close(self) -> None:
+        """Release long-lived resources such as shared browsers."""
+
     # ------------------------------------------------------------------
     async def fetch_html(self, url: str) -> str:
         """Fetch HTML with retries and anti-bot mitigation."""
@@ -108,24 +232,24 @@ class BaseParser:
         for attempt in range(1, settings.http_retries + 1):
             try:
                 response = self._session.get(url, headers=headers, timeout=settings.http_timeout)
-                last_html = response.text
-                if self._is_antibot_response(response):
+                last_html = response_text(response)
+                if self._is_antibot_response(response, last_html):
                     LOGGER.warning(
                         "Anti-bot detected during requests fetch",
                         extra={"url": url, "status": response.status_code, "attempt": attempt},
                     )
-                    self._record_antibot(url, response.text)
-                    time.sleep(settings.anti_bot_delay_seconds)
-                    headers = self._build_headers()
+                    self._record_antibot(url, last_html)
+                    time.sleep(self._antibot_delay(response, attempt))
+                    headers = self._build_headers(rotate=True)
                     continue
                 response.raise_for_status()
                 self._reset_antibot()
-                return response.text
+                return last_html
             except Exception as exc:  # pragma: no cover - network dependent
                 LOGGER.warning("Primary fetch failed", exc_info=exc, extra={"url": url, "attempt": attempt})
                 last_error = exc
                 time.sleep(settings.anti_bot_delay_seconds)
-                headers = self._build_headers()
+                headers = self._build_headers(rotate=True)
 
         LOGGER.info("Falling back to cloudscraper", extra={"url": url})
         self._cloudscraper_fallbacks += 1
@@ -135,13 +259,13 @@ class BaseParser:
             )
         try:
             result = self._scraper.get(url, headers=headers, timeout=settings.http_timeout)
-            last_html = result.text
+            last_html = response_text(result)
             result.raise_for_status()
-            if self._is_antibot_response(result):
-                self._record_antibot(url, result.text)
+            if self._is_antibot_response(result, last_html):
+                self._record_antibot(url, last_html)
             else:
                 self._reset_antibot()
-                return result.text
+                return last_html
         except Exception as exc:  # pragma: no cover - network dependent
             LOGGER.error("Cloudscraper failed", exc_info=exc, extra={"url": url})
             last_error = exc
@@ -165,21 +289,30 @@ class BaseParser:
 
         return html
 
-    def _build_headers(self) -> dict[str, str]:
-        return {
-            "User-Agent": self._choose_user_agent(),
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache",
-        }
+    def _build_headers(self, *, rotate: bool = False) -> dict[str, str]:
+        # UserAgent().random costs milliseconds, so the headers are kept per
+        # instance and only rebuilt when a retry asks for a fresh identity.
+        if rotate or self._headers is None:
+            self._headers = {"User-Agent": self._choose_user_agent(), **self.default_headers}
+        return self._headers
 
-    def _is_antibot_response(self, response: requests.Response) -> bool:
+    def _is_antibot_response(self, response: requests.Response, html: str) -> bool:
         if response.status_code in (403, 429):
             return True
-        text = response.text.lower()
+        text = html.lower()
         return any(pattern in text for pattern in self.anti_bot_patterns)
 
+    @staticmethod
+    def _antibot_delay(response: requests.Response, attempt: int) -> float:
+        delay = settings.anti_bot_delay_seconds
+        if response.status_code == 429:
+            # Rate limited: back off exponentially, or as long as the server asks.
+            delay *= 2 ** (attempt - 1)
+            retry_after = response.headers.get("Retry-After") or ""
+            if retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+        return min(delay, _MAX_BACKOFF_SECONDS)
+
     def _choose_user_agent(self) -> str:
         try:  # pragma: no cover - dynamic library
             return self._user_agent_provider.random
@@ -214,25 +347,19 @@ class BaseParser:
     async def _fetch_with_playwright(self, url: str) -> str:
         from playwright.async_api import async_playwright
 
-        launch_args = (os.environ.get("PW_LAUNCH_ARGS") or "").split()
-        price_wait_map = {
-            "whitehills.ru": "span.price_value",
-            "moscow.petrovich.ru": "[data-test='product-retail-price']",
-            "petrovich.ru": "[data-test='product-retail-price']",
-        }
-
         async with async_playwright() as playwright_ctx:  # pragma: no cover - requires browser
             browser = await playwright_ctx.chromium.launch(
                 headless=settings.playwright_headless,
                 slow_mo=settings.playwright_slow_mo,
-                args=launch_args or None,
+                args=_PW_LAUNCH_ARGS or None,
             )
             context = None
             try:
-                context = await browser.new_context(user_agent=self._choose_user_agent())
+                context = await browser.new_context(user_agent=self._build_headers()["User-Agent"])
+                await block_heavy_requests(context, _HTML_FETCH_ROUTE_PATTERN)
                 page = await context.new_page()
                 await page.goto(url, wait_until="domcontentloaded", timeout=30000)
-                selector = next((value for key, value in price_wait_map.items() if key in url), None)
+                selector = next((value for key, value in _PRICE_WAIT_SELECTORS.items() if key in url), None)
                 if selector:
                     timeout = 8000
                     if "whitehills.ru" in url:
@@ -241,10 +368,14 @@ class BaseParser:
                         await page.wait_for_selector(selector, timeout=timeout)
                     except Exception:
                         pass
-                try:
-                    await page.wait_for_load_state("networkidle", timeout=8000)
-                except Exception:
-                    pass
+                else:
+                    # Network idle is only the fallback for sites without a price
+                    # selector; stacked after a timed-out selector wait it added
+                    # another 8s to pages that never render the price.
+                    try:
+                        await page.wait_for_load_state("networkidle", timeout=8000)
+                    except Exception:
+                        pass
                 html = await page.content()
             finally:
                 if context is not None:
@@ -255,13 +386,10 @@ class BaseParser:
         return html
 
     # ------------------------------------------------------------------
-    def parse_json_from_scripts(self, soup: BeautifulSoup, keys: Iterable[str]) -> Dict[str, Any]:
+    def parse_json_from_scripts(self, doc: etree._Element, keys: Iterable[str]) -> Dict[str, Any]:
         """Extract JSON data from script tags containing specified keys."""
 
-        for script in soup.find_all("script"):
-            text = script.string or script.text
-            if not text:
-                continue
+        for text in _SCRIPT_TEXT_XPATH(doc):
             if not any(key in text for key in keys):
                 continue
             for candidate in self._extract_json_candidates(text):
@@ -322,7 +450,7 @@ class BaseParser:
             candidate = candidate[:-1]
 
         try:
-            parsed = json.loads(candidate)
+            parsed = orjson.loads(candidate)
         except json.JSONDecodeError:
             return []
 
@@ -349,21 +477,37 @@ class BaseParser:
         return _walk(data)
 
     def extract_number(self, text: str) -> float:
-        text = text.replace("\xa0", " ")
-        cleaned = re.sub(r"[^0-9,\.]+", "", text).replace(",", ".")
+        cleaned = _NON_NUMBER_PATTERN.sub("", text).replace(",", ".")
         try:
             return float(cleaned)
         except ValueError:
             raise ScraperError(f"Cannot parse price from '{text}'")
 
+    def normalize_prices(self, values: Iterable[Any]) -> List[Optional[Decimal]]:
+        """Normalize a batch of price values; unparsable entries become ``None``."""
+
+        normalize = self.normalize_price
+        results: List[Optional[Decimal]] = []
+        for value in values:
+            try:
+                results.append(normalize(value))
+            except (ValueError, TypeError):
+                results.append(None)
+        return results
+
     def normalize_price(self, value: Any) -> Decimal:
         """Normalize incoming price values to ``Decimal`` with two decimals."""
 
         if value is None:
             raise ValueError("Price value is None")
+        # bool is an int subclass; a JSON "price": true is not a 1 ₽ price.
+        if isinstance(value, bool):
+            raise ValueError(f"Boolean is not a price: {value!r}")
         if isinstance(value, Decimal):
             decimal_value = value
-        elif isinstance(value, (int, float)):
+        elif isinstance(value, int):
+            decimal_value = Decimal(value)
+        elif isinstance(value, float):
             decimal_value = Decimal(str(value))
         elif isinstance(value, str):
             try:
@@ -374,7 +518,7 @@ class BaseParser:
             raise TypeError(f"Unsupported price type: {type(value)!r}")
 
         try:
-            return decimal_value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            return decimal_value.quantize(_CENT, rounding=ROUND_HALF_UP)
         except InvalidOperation as exc:
             raise ValueError(f"Cannot quantize decimal value '{decimal_value}'") from exc
 
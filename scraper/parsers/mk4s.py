@@ -1,14 +1,48 @@
 """Parser implementation for mk4s.ru with support for product variants."""
 from __future__ import annotations
 
-import json
 import re
+from decimal import Decimal
 from itertools import product as iter_product
 from typing import Any, Dict, List, Optional, Tuple
 
-from bs4 import BeautifulSoup
-
-from .base import BaseParser, ProductSnapshot, ScraperError
+import orjson
+from lxml import etree
+
+from .base import BaseParser, ProductSnapshot, ScraperError, class_xpath, node_text, parse_html
+
+TOKEN_SEPARATOR_PATTERN = re.compile(r"[|/,:;\s]+")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+PRICE_XPATHS = tuple(
+    etree.XPath(f"(//*[{predicate}])[1]")
+    for predicate in (
+        class_xpath("product-add-to-cart__price"),
+        "@data-product-price",
+        class_xpath("price--current"),
+        class_xpath("product-price__current"),
+        class_xpath("product-price"),
+        class_xpath("product__price"),
+    )
+)
+TITLE_XPATH = etree.XPath(f"(//*[{class_xpath('product__title')}] | //h1)[1]")
+VARIANT_BLOCK_XPATH = etree.XPath(f"//*[{class_xpath('block')}][{class_xpath('block_secondary')}]")
+VARIANT_HEADER_XPATH = etree.XPath(f"descendant::*[{class_xpath('block__header', 'block__title')}][1]")
+VARIANT_VALUE_XPATHS = (
+    etree.XPath(
+        f"descendant::*[{class_xpath('product-feature-select__color-wrapper')}]"
+        f"//*[{class_xpath('tooltip__content')}]"
+    ),
+    etree.XPath(f"descendant::*[{class_xpath('product-feature-select__value')}]"),
+    etree.XPath("descendant::option"),
+    etree.XPath("descendant::label"),
+    etree.XPath(f"descendant::*[{class_xpath('product-feature-select__item')}]"),
+)
+CATEGORY_CARD_XPATH = etree.XPath("//*[@data-product]")
+# descendant::...[1] stops at the first match inside each card.
+CATEGORY_LINK_XPATH = etree.XPath("descendant::a[1]")
+CATEGORY_PRICE_TEXT_XPATH = etree.XPath(
+    f"string(descendant::*[{class_xpath('price', 'product-card__price')}][1])", smart_strings=False
+)
 
 
 class MK4SParser(BaseParser):
@@ -16,55 +50,61 @@ class MK4SParser(BaseParser):
 
     async def fetch_product(self, url: str, *, variant: Optional[str] = None) -> ProductSnapshot:
         html = await self.fetch_html(url)
-        soup = BeautifulSoup(html, "lxml")
-        data = self.parse_json_from_scripts(soup, ["variants", "product", "sku"])
+        doc = parse_html(html)
+        if doc is None:
+            raise ScraperError("MK4S product data not found")
+        data = self.parse_json_from_scripts(doc, ["variants", "product", "sku"])
 
         snapshot = None
         if data:
-            snapshot = self._build_snapshot_from_json(url, soup, data, variant)
+            snapshot = self._build_snapshot_from_json(url, doc, data, variant)
         if snapshot is None:
-            snapshot = self._build_snapshot_from_dom(url, soup, variant)
+            snapshot = self._build_snapshot_from_dom(url, doc, variant)
         if snapshot is None:
             raise ScraperError("MK4S product data not found")
         return snapshot
 
     async def fetch_category(self, url: str) -> List[ProductSnapshot]:
         html = await self.fetch_html(url)
-        soup = BeautifulSoup(html, "lxml")
+        doc = parse_html(html)
         items: List[ProductSnapshot] = []
-        for container in soup.select("[data-product]"):
+        if doc is None:
+            return items
+        for container in CATEGORY_CARD_XPATH(doc):
             data_attr = container.get("data-product")
             if not data_attr:
                 continue
             price = None
             if data_attr.startswith("{"):
                 try:
-                    product_json = json.loads(data_attr)
+                    product_json = orjson.loads(data_attr)
                 except Exception:
                     product_json = {}
-                price = product_json.get("price") or product_json.get("priceValue")
+                price = self._extract_price_value(
+                    product_json.get("price") or product_json.get("priceValue")
+                )
             if price is None:
-                price_node = container.select_one(".price, .product-card__price")
-                if price_node:
-                    price = self.extract_number(price_node.get_text())
-            link = container.select_one("a")
-            href = link.get("href") if link else None
+                price_text = CATEGORY_PRICE_TEXT_XPATH(container)
+                if price_text:
+                    price = self._extract_price_value(price_text)
+            links = CATEGORY_LINK_XPATH(container)
+            link = links[0] if links else None
+            href = link.get("href") if link is not None else None
             if not price or not href:
                 continue
-            title = link.get_text(strip=True) if link else None
             items.append(
                 ProductSnapshot(
                     url=href if href.startswith("http") else f"https://mk4s.ru{href}",
-                    price=float(price),
+                    price=price,
                     currency="RUB",
-                    title=title,
+                    title=node_text(link, ""),
                 )
             )
         return items
 
     # ------------------------------------------------------------------
     def _build_snapshot_from_json(
-        self, url: str, soup: BeautifulSoup, data: Dict[str, Any], variant: Optional[str]
+        self, url: str, doc: etree._Element, data: Dict[str, Any], variant: Optional[str]
     ) -> Optional[ProductSnapshot]:
         product = self._find_product_dict(data)
         if not product:
@@ -96,7 +136,7 @@ class MK4SParser(BaseParser):
             price = self._extract_price_value(product.get("price") or data.get("price"))
 
         if price is None:
-            price = self._find_price_in_dom(soup)
+            price = self._find_price_in_dom(doc)
 
         if price is None:
             return None
@@ -117,16 +157,16 @@ class MK4SParser(BaseParser):
         )
 
     def _build_snapshot_from_dom(
-        self, url: str, soup: BeautifulSoup, variant: Optional[str]
+        self, url: str, doc: etree._Element, variant: Optional[str]
     ) -> Optional[ProductSnapshot]:
-        price = self._find_price_in_dom(soup)
+        price = self._find_price_in_dom(doc)
         if price is None:
             return None
 
-        title_node = soup.select_one(".product__title, h1")
-        title = title_node.get_text(strip=True) if title_node else None
+        title_nodes = TITLE_XPATH(doc)
+        title = node_text(title_nodes[0], "") if title_nodes else None
 
-        blocks = self._extract_variant_blocks(soup)
+        blocks = self._extract_variant_blocks(doc)
         combos = self._build_variant_combinations(blocks)
 
         chosen_variant_map: Optional[Dict[str, str]] = None
@@ -195,62 +235,45 @@ class MK4SParser(BaseParser):
                         variants[name] = item
         return variants
 
-    def _extract_price_value(self, price: Any) -> Optional[float]:
-        if price is None:
+    def _extract_price_value(self, price: Any) -> Optional[Decimal]:
+        # Parse JSON strings straight to Decimal; a float detour would lose
+        # precision on values such as "1234.57".
+        if price is None or isinstance(price, bool):
             return None
-        if isinstance(price, (int, float)):
-            return float(price)
-        if isinstance(price, str):
+        if isinstance(price, (int, float, str)):
             try:
-                return float(price)
+                return self.normalize_price(price)
             except ValueError:
-                try:
-                    return self.extract_number(price)
-                except ScraperError:
-                    return None
+                return None
         return None
 
-    def _find_price_in_dom(self, soup: BeautifulSoup) -> Optional[float]:
-        price_selectors = [
-            ".product-add-to-cart__price",
-            "[data-product-price]",
-            ".price--current",
-            ".product-price__current",
-            ".product-price",
-            ".product__price",
-        ]
-        for selector in price_selectors:
-            node = soup.select_one(selector)
-            if not node:
+    def _find_price_in_dom(self, doc: etree._Element) -> Optional[Decimal]:
+        for xpath in PRICE_XPATHS:
+            nodes = xpath(doc)
+            if not nodes:
                 continue
-            text = node.get_text(" ", strip=True)
+            text = node_text(nodes[0])
             if not text:
                 continue
             try:
-                return self.extract_number(text)
-            except ScraperError:
+                return self.normalize_price(text)
+            except ValueError:
                 continue
         return None
 
-    def _extract_variant_blocks(self, soup: BeautifulSoup) -> List[Tuple[str, List[str]]]:
+    def _extract_variant_blocks(self, doc: etree._Element) -> List[Tuple[str, List[str]]]:
         blocks: List[Tuple[str, List[str]]] = []
-        for block in soup.select(".block.block_secondary"):
-            header = block.select_one(".block__header, .block__title")
-            if not header:
+        for block in VARIANT_BLOCK_XPATH(doc):
+            headers = VARIANT_HEADER_XPATH(block)
+            if not headers:
                 continue
-            name = header.get_text(strip=True).rstrip(":")
+            name = node_text(headers[0], "").rstrip(":")
             if not name:
                 continue
             variants: List[str] = []
 
-            for selector in [
-                ".product-feature-select__color-wrapper .tooltip__content",
-                ".product-feature-select__value",
-                "option",
-                "label",
-                ".product-feature-select__item",
-            ]:
-                for element in block.select(selector):
+            for xpath in VARIANT_VALUE_XPATHS:
+                for element in xpath(block):
                     value = self._extract_text_from_element(element)
                     if value and value not in variants:
                         variants.append(value)
@@ -259,9 +282,9 @@ class MK4SParser(BaseParser):
                 blocks.append((name, variants))
         return blocks
 
-    def _extract_text_from_element(self, element: Any) -> Optional[str]:
+    def _extract_text_from_element(self, element: etree._Element) -> Optional[str]:
         texts: List[str] = []
-        text_content = element.get_text(" ", strip=True)
+        text_content = node_text(element)
         if text_content:
             texts.append(text_content)
         for attr in ("data-value", "data-title", "title", "value", "aria-label", "data-tooltip"):
@@ -308,10 +331,10 @@ class MK4SParser(BaseParser):
 
     def _normalize_tokens(self, text: str) -> set[str]:
         normalized = self._normalize_string(text)
-        return {part for part in re.split(r"[|/,:;\s]+", normalized) if part}
+        return {part for part in TOKEN_SEPARATOR_PATTERN.split(normalized) if part}
 
     def _normalize_string(self, text: str) -> str:
-        return re.sub(r"\s+", " ", text.strip().lower()) if text else ""
+        return WHITESPACE_PATTERN.sub(" ", text.strip().lower()) if text else ""
 
 
 __all__ = ["MK4SParser"]
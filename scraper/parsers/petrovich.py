@@ -5,15 +5,45 @@ import json
 import logging
 import re
 from decimal import Decimal, InvalidOperation
-from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from typing import Iterator, List, Optional, Sequence, Tuple
 
-from bs4 import BeautifulSoup
+import orjson
+from lxml import etree
 
-from .base import BaseParser, PriceNotFoundError, ProductSnapshot
+from .base import BaseParser, PriceNotFoundError, ProductSnapshot, class_xpath, node_text, parse_html
 
 LOGGER = logging.getLogger(__name__)
 
 PRICE_TEXT_PATTERN = re.compile(r"\d[\d\s\xa0\u2009\u202F.,]*")
+DIGIT_PATTERN = re.compile(r"\d")
+# No-break and thin spaces become plain spaces in one pass, so context hints
+# written with a regular space still match.
+THIN_SPACE_TABLE = str.maketrans({"\xa0": " ", "\u2009": " ", "\u202f": " "})
+NON_PRICE_CHARS_PATTERN = re.compile(r"[^0-9,.]+")
+CURRENCY_HINT_PATTERN = re.compile(r"₽|руб|rub|rur")
+JSON_START_PATTERN = re.compile(r"\s*[\[{]")
+PRODUCT_PROBE_PATTERN = re.compile("product", re.I)
+JSONLD_SCRIPT_PATTERN = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.I | re.S,
+)
+H1_XPATH = etree.XPath("//h1")
+RETAIL_PRICE_XPATH = etree.XPath("//*[@data-test='product-retail-price']")
+META_PRICE_CONTENT_XPATH = etree.XPath("//meta[@itemprop='price']/@content", smart_strings=False)
+OFFERS_PRICE_XPATH = etree.XPath("//*[@itemprop='offers']//*[@itemprop='price']")
+CLASS_PRICE_XPATH = etree.XPath("//*[contains(@class, 'price')]")
+NEXT_DATA_XPATH = etree.XPath("//script[@id='__NEXT_DATA__'][@type='application/json']")
+# __NEXT_DATA__ is decoded and scored by _price_from_next_data just before the
+# inline-script sweep; skipping it here avoids decoding the largest blob twice.
+SCRIPT_TEXT_XPATH = etree.XPath(
+    "//script[not(@id='__NEXT_DATA__' and @type='application/json')]/text()", smart_strings=False
+)
+DATA_PRICE_ELEMENTS_XPATH = etree.XPath(
+    "//*[@*[starts-with(name(), 'data') and (contains(name(), 'price') or contains(name(), 'cost'))]]"
+)
+CATEGORY_CARD_XPATH = etree.XPath(f"//a[{class_xpath('catalogCard')}]")
+CATEGORY_PRICE_XPATH = etree.XPath(f"descendant::*[{class_xpath('catalogCard-price')}][1]")
+CATEGORY_TITLE_XPATH = etree.XPath(f"descendant::*[{class_xpath('catalogCard-title')}][1]")
 CARD_CONTEXT_HINTS = (
     "по карте",
     "карте",
@@ -80,18 +110,27 @@ NEGATIVE_PATH_HINTS = (
 )
 
 
+def _hint_pattern(hints: Sequence[str]) -> re.Pattern[str]:
+    return re.compile("|".join(re.escape(hint) for hint in hints))
+
+
+# One C-level scan per hint group instead of a Python loop over every hint.
+CARD_CONTEXT_PATTERN = _hint_pattern(CARD_CONTEXT_HINTS)
+REGULAR_CONTEXT_PATTERN = _hint_pattern(REGULAR_CONTEXT_HINTS)
+NEGATIVE_CONTEXT_PATTERN = _hint_pattern(NEGATIVE_CONTEXT_HINTS)
+PRICE_PATH_PATTERN = _hint_pattern(PRICE_PATH_KEYWORDS)
+REGULAR_PATH_PATTERN = _hint_pattern(REGULAR_PATH_HINTS)
+CARD_PATH_PATTERN = _hint_pattern(CARD_PATH_HINTS)
+CARD_EXCLUSION_PATTERN = _hint_pattern(CARD_EXCLUSION_HINTS)
+NEGATIVE_PATH_PATTERN = _hint_pattern(NEGATIVE_PATH_HINTS)
+
+
 def _parse_decimal_value(value: str) -> Decimal:
     if value is None:
         raise PriceNotFoundError("Price text is empty")
 
-    normalized = (
-        value.replace("\xa0", " ")
-        .replace("\u2009", " ")
-        .replace("\u202F", " ")
-    )
-    normalized = normalized.replace(" ", "")
-    normalized = re.sub(r"[^0-9,\.]+", "", normalized)
-    normalized = normalized.replace(",", ".")
+    # Thin/no-break spaces and currency marks all fall outside [0-9,.].
+    normalized = NON_PRICE_CHARS_PATTERN.sub("", value).replace(",", ".")
 
     if normalized.count(".") > 1:
         parts = normalized.split(".")
@@ -112,11 +151,7 @@ def _extract_price_from_text(text: str, *, prefer_regular: bool = False) -> Opti
     if not text:
         return None
 
-    normalized_text = (
-        text.replace("\xa0", " ")
-        .replace("\u2009", " ")
-        .replace("\u202F", " ")
-    )
+    normalized_text = text.translate(THIN_SPACE_TABLE)
 
     matches: List[Tuple[int, int, int, Decimal]] = []
     for match in PRICE_TEXT_PATTERN.finditer(normalized_text):
@@ -134,16 +169,16 @@ def _extract_price_from_text(text: str, *, prefer_regular: bool = False) -> Opti
         priority = 1
         if prefer_regular:
             priority = 2
-            if any(hint in context_lower for hint in REGULAR_CONTEXT_HINTS):
+            if REGULAR_CONTEXT_PATTERN.search(context_lower):
                 priority = 0
-            elif any(hint in context_lower for hint in CARD_CONTEXT_HINTS):
+            elif CARD_CONTEXT_PATTERN.search(context_lower):
                 priority = 3
             else:
                 priority = 1
-        if any(hint in context_lower for hint in NEGATIVE_CONTEXT_HINTS):
+        if NEGATIVE_CONTEXT_PATTERN.search(context_lower):
             priority += 1
 
-        currency_bonus = -1 if ("₽" in context_slice or "руб" in context_lower or "rub" in context_lower or "rur" in context_lower) else 0
+        currency_bonus = -1 if CURRENCY_HINT_PATTERN.search(context_lower) else 0
         matches.append((priority, currency_bonus, match.start(), price))
 
     if not matches:
@@ -153,41 +188,38 @@ def _extract_price_from_text(text: str, *, prefer_regular: bool = False) -> Opti
     return matches[0][3]
 
 
-def _iter_price_value_paths(data: object, path: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], object]]:
-    if isinstance(data, dict):
-        for key, value in data.items():
-            key_str = str(key)
-            new_path = path + (key_str,)
-            yield from _iter_price_value_paths(value, new_path)
-    elif isinstance(data, list):
-        for item in data:
-            yield from _iter_price_value_paths(item, path)
-    elif isinstance(data, (int, float, Decimal)) and not isinstance(data, bool):
-        yield path, data
-    elif isinstance(data, str):
-        yield path, data
-
-
-def _contains_any(segment: str, needles: Sequence[str]) -> bool:
-    lowered = segment.lower()
-    return any(needle in lowered for needle in needles)
+def _iter_price_value_paths(data: object) -> Iterator[Tuple[Tuple[str, ...], object]]:
+    # Explicit pre-order stack: the recursive ``yield from`` version passed every
+    # leaf back up through one generator frame per nesting level.
+    stack: List[Tuple[object, Tuple[str, ...]]] = [(data, ())]
+    while stack:
+        node, path = stack.pop()
+        if isinstance(node, dict):
+            for key in reversed(node):
+                stack.append((node[key], path + (str(key),)))
+        elif isinstance(node, list):
+            for item in reversed(node):
+                stack.append((item, path))
+        elif isinstance(node, str) or (isinstance(node, (int, float, Decimal)) and not isinstance(node, bool)):
+            yield path, node
 
 
 def _score_price_path(path: Sequence[str], *, prefer_regular: bool) -> Optional[int]:
-    lowered_path = [segment.lower() for segment in path if segment]
-    if not lowered_path:
+    # Hints never contain "/", so searching the joined path equals checking each segment.
+    lowered = "/".join(segment.lower() for segment in path if segment)
+    if not lowered:
         return None
 
-    if not any(_contains_any(segment, PRICE_PATH_KEYWORDS) for segment in lowered_path):
+    if not PRICE_PATH_PATTERN.search(lowered):
         return None
 
     score = 4 if prefer_regular else 3
 
-    has_without_card = any(_contains_any(segment, CARD_EXCLUSION_HINTS) for segment in lowered_path)
-    has_card = any(_contains_any(segment, CARD_PATH_HINTS) for segment in lowered_path)
-    has_regular = any(_contains_any(segment, REGULAR_PATH_HINTS) for segment in lowered_path)
-    has_current = any("current" in segment for segment in lowered_path)
-    has_negative = any(_contains_any(segment, NEGATIVE_PATH_HINTS) for segment in lowered_path)
+    has_without_card = CARD_EXCLUSION_PATTERN.search(lowered) is not None
+    has_card = CARD_PATH_PATTERN.search(lowered) is not None
+    has_regular = REGULAR_PATH_PATTERN.search(lowered) is not None
+    has_current = "current" in lowered
+    has_negative = NEGATIVE_PATH_PATTERN.search(lowered) is not None
 
     if has_regular or has_without_card:
         score = min(score, 0)
@@ -208,7 +240,7 @@ def _collect_price_candidates(data: object, *, prefer_regular: bool) -> List[Tup
     for path, raw_value in _iter_price_value_paths(data):
         if not path:
             continue
-        if isinstance(raw_value, str) and not any(char.isdigit() for char in raw_value):
+        if isinstance(raw_value, str) and not DIGIT_PATTERN.search(raw_value):
             continue
         try:
             price = _parse_decimal_value(str(raw_value))
@@ -225,14 +257,25 @@ def _collect_price_candidates(data: object, *, prefer_regular: bool) -> List[Tup
     candidates.sort(key=lambda item: (item[0], item[1], item[2]))
     return candidates
 
+
+def _is_product_type(value: object) -> bool:
+    # JSON only yields str/list here, so concrete isinstance checks replace the
+    # slower Iterable ABC check; the exact "Product" spelling skips lower().
+    if isinstance(value, str):
+        return value == "Product" or value.lower() == "product"
+    if isinstance(value, (list, tuple)):
+        return any(
+            isinstance(item, str) and (item == "Product" or item.lower() == "product") for item in value
+        )
+    return False
+
+
 class PetrovichParser(BaseParser):
     """Parser for Petrovich store."""
 
     async def fetch_product(self, url: str, *, variant: Optional[str] = None) -> ProductSnapshot:
         html = await self.fetch_html(url)
-        soup = BeautifulSoup(html, "lxml")
-
-        jsonld_product = self._extract_jsonld_product(soup, url)
+        jsonld_product = self._extract_jsonld_product(html, url)
 
         title: Optional[str] = None
         sku: Optional[str] = None
@@ -240,126 +283,145 @@ class PetrovichParser(BaseParser):
             title = jsonld_product.get("name") or jsonld_product.get("title") or title
             sku = jsonld_product.get("sku") or jsonld_product.get("productID") or sku
 
-        price = self._extract_price(soup, url, jsonld_product=jsonld_product)
+        # The tree is only built when JSON-LD did not settle both price and title.
+        doc: Optional[etree._Element] = None
+        price = self._price_from_jsonld(jsonld_product, url) if jsonld_product else None
+        if price is None:
+            doc = parse_html(html)
+            price = self._extract_price(doc, url)
 
         if not title:
-            header = soup.select_one("h1")
-            title = header.get_text(strip=True) if header else None
+            if doc is None:
+                doc = parse_html(html)
+            headers = H1_XPATH(doc) if doc is not None else []
+            title = node_text(headers[0], "") if headers else None
 
         return ProductSnapshot(url=url, price=price, currency="RUB", title=title, sku=sku, variant_key=variant)
 
     def parse_price(self, html: str, url: str | None = None) -> Decimal:
-        soup = BeautifulSoup(html, "lxml")
-        return self._extract_price(soup, url)
+        jsonld_product = self._extract_jsonld_product(html, url)
+        if jsonld_product:
+            price = self._price_from_jsonld(jsonld_product, url)
+            if price is not None:
+                return price
+        return self._extract_price(parse_html(html), url)
 
     async def fetch_category(self, url: str) -> List[ProductSnapshot]:
         html = await self.fetch_html(url)
-        soup = BeautifulSoup(html, "lxml")
+        doc = parse_html(html)
         items: List[ProductSnapshot] = []
-        for product in soup.select("a.catalogCard"):
+        if doc is None:
+            return items
+        cards: List[Tuple[str, str, Optional[str]]] = []
+        for product in CATEGORY_CARD_XPATH(doc):
             href = product.get("href")
-            price_node = product.select_one(".catalogCard-price")
-            if not href or not price_node:
+            price_nodes = CATEGORY_PRICE_XPATH(product)
+            if not href or not price_nodes:
                 continue
-            try:
-                price = self.normalize_price(price_node.get_text())
-            except ValueError:
-                LOGGER.debug("Petrovich category price parse failed", extra={"url": url})
+            titles = CATEGORY_TITLE_XPATH(product)
+            cards.append((href, price_nodes[0].text_content(), node_text(titles[0], "") if titles else None))
+
+        debug = LOGGER.isEnabledFor(logging.DEBUG)
+        prices = self.normalize_prices(price_text for _, price_text, _ in cards)
+        for (href, _, title), price in zip(cards, prices):
+            if price is None:
+                if debug:
+                    LOGGER.debug("Petrovich category price parse failed", extra={"url": url})
                 continue
-            title = product.select_one(".catalogCard-title")
             items.append(
                 ProductSnapshot(
                     url=href if href.startswith("http") else f"https://moscow.petrovich.ru{href}",
                     price=price,
                     currency="RUB",
-                    title=title.get_text(strip=True) if title else None,
+                    title=title,
                 )
             )
         return items
 
     # ------------------------------------------------------------------
-    def _extract_price(
-        self,
-        soup: BeautifulSoup,
-        url: str | None,
-        *,
-        jsonld_product: Optional[dict] = None,
-    ) -> Decimal:
-        product_data = jsonld_product or self._extract_jsonld_product(soup, url)
-        if product_data:
-            price = self._price_from_jsonld(product_data, url)
-            if price is not None:
-                return price
-
-        element = soup.select_one("[data-test='product-retail-price']")
-        if element:
-            text = element.get_text(" ", strip=True)
-            price = _extract_price_from_text(text, prefer_regular=True)
-            if price is not None:
-                LOGGER.info("Petrovich: price via [data-test='product-retail-price'] = %s", price)
-                return price
-            LOGGER.debug("Petrovich data-test price invalid", extra={"url": url})
-
-        meta = soup.select_one("meta[itemprop='price'][content]")
-        if meta:
-            content = meta.get("content")
-            if content:
-                price = _extract_price_from_text(content, prefer_regular=True)
+    def _extract_price(self, doc: Optional[etree._Element], url: str | None) -> Decimal:
+        if doc is not None:
+            for extractor in (
+                self._price_from_retail_element,
+                self._price_from_meta,
+                self._price_from_data_attributes,
+                self._price_from_next_data,
+                self._price_from_scripts,
+                self._price_from_price_nodes,
+            ):
+                price = extractor(doc, url)
                 if price is not None:
-                    LOGGER.info("Petrovich: price via meta[itemprop='price'] = %s", price)
                     return price
-                LOGGER.debug("Petrovich meta price invalid", extra={"url": url})
 
-        attribute_price = self._price_from_data_attributes(soup, url)
-        if attribute_price is not None:
-            return attribute_price
+        LOGGER.warning("Petrovich price not found", extra={"url": url})
+        raise PriceNotFoundError("Price not found on Petrovich product page")
 
-        next_data_price = self._price_from_next_data(soup, url)
-        if next_data_price is not None:
-            return next_data_price
+    def _price_from_retail_element(self, doc: etree._Element, url: str | None) -> Optional[Decimal]:
+        elements = RETAIL_PRICE_XPATH(doc)
+        if not elements:
+            return None
+        price = _extract_price_from_text(node_text(elements[0]), prefer_regular=True)
+        if price is not None:
+            LOGGER.info("Petrovich: price via [data-test='product-retail-price'] = %s", price)
+            return price
+        LOGGER.debug("Petrovich data-test price invalid", extra={"url": url})
+        return None
 
-        script_price = self._price_from_scripts(soup)
-        if script_price is not None:
-            return script_price
+    def _price_from_meta(self, doc: etree._Element, url: str | None) -> Optional[Decimal]:
+        contents = META_PRICE_CONTENT_XPATH(doc)
+        if not contents or not contents[0]:
+            return None
+        price = _extract_price_from_text(contents[0], prefer_regular=True)
+        if price is not None:
+            LOGGER.info("Petrovich: price via meta[itemprop='price'] = %s", price)
+            return price
+        LOGGER.debug("Petrovich meta price invalid", extra={"url": url})
+        return None
 
-        for selector in ("[itemprop='offers'] [itemprop='price']", "[class*='price']"):
-            for node in soup.select(selector):
-                text = node.get("content") or node.get_text(" ", strip=True)
+    def _price_from_price_nodes(self, doc: etree._Element, url: str | None) -> Optional[Decimal]:
+        for xpath, source in (
+            (OFFERS_PRICE_XPATH, "itemprop offers price"),
+            (CLASS_PRICE_XPATH, "class*='price'"),
+        ):
+            for node in xpath(doc):
+                text = node.get("content") or node_text(node)
                 price = _extract_price_from_text(text, prefer_regular=True)
                 if price is None:
                     continue
-                if selector == "[itemprop='offers'] [itemprop='price']":
-                    LOGGER.info("Petrovich: price via itemprop offers price = %s", price)
-                else:
-                    LOGGER.info("Petrovich: price via class*='price' = %s", price)
+                LOGGER.info("Petrovich: price via %s = %s", source, price)
                 return price
+        return None
 
-        LOGGER.warning("Petrovich price not found", extra={"url": url})
-        raise PriceNotFoundError("Price not found on Petrovich product page")
-
-    def _extract_jsonld_product(self, soup: BeautifulSoup, url: str | None) -> Optional[dict]:
-        scripts = soup.find_all("script", attrs={"type": "application/ld+json"})
-        for script in scripts:
-            text = script.string or script.text or ""
-            if not text.strip():
+    def _extract_jsonld_product(self, html: str, url: str | None) -> Optional[dict]:
+        for text in JSONLD_SCRIPT_PATTERN.findall(html):
+            # Only JSON object/array blocks that mention a Product are worth decoding;
+            # both probes scan in place instead of copying the blob via lower()/strip().
+            if not JSON_START_PATTERN.match(text) or not PRODUCT_PROBE_PATTERN.search(text):
                 continue
             try:
-                data = json.loads(text)
+                data = orjson.loads(text)
             except json.JSONDecodeError:
                 LOGGER.debug("Petrovich JSON-LD decode failed", extra={"url": url})
                 continue
-            for candidate in self._iter_dicts(data):
-                if self._is_product_type(candidate.get("@type")):
-                    return candidate
+            stack = [data]
+            while stack:
+                node = stack.pop()
+                if isinstance(node, dict):
+                    if _is_product_type(node.get("@type")):
+                        return node
+                    stack.extend(reversed(node.values()))
+                elif isinstance(node, list):
+                    stack.extend(reversed(node))
         return None
 
-    def _price_from_scripts(self, soup: BeautifulSoup) -> Optional[Decimal]:
-        for script in soup.find_all("script"):
-            text = script.string or script.text or ""
-            if not text.strip():
+    def _price_from_scripts(self, doc: etree._Element, url: str | None) -> Optional[Decimal]:
+        for text in SCRIPT_TEXT_XPATH(doc):
+            text = text.lstrip()
+            # Only object/array payloads can yield price paths; skip plain JS.
+            if not text or text[0] not in "{[":
                 continue
             try:
-                data = json.loads(text)
+                data = orjson.loads(text)
             except json.JSONDecodeError:
                 continue
 
@@ -388,15 +450,15 @@ class PetrovichParser(BaseParser):
         LOGGER.debug("Petrovich JSON-LD price not found", extra={"url": url})
         return None
 
-    def _price_from_next_data(self, soup: BeautifulSoup, url: str | None) -> Optional[Decimal]:
-        script = soup.find("script", attrs={"id": "__NEXT_DATA__", "type": "application/json"})
-        if not script:
+    def _price_from_next_data(self, doc: etree._Element, url: str | None) -> Optional[Decimal]:
+        scripts = NEXT_DATA_XPATH(doc)
+        if not scripts:
             return None
-        payload = script.string or script.text or ""
+        payload = scripts[0].text_content()
         if not payload.strip():
             return None
         try:
-            data = json.loads(payload)
+            data = orjson.loads(payload)
         except json.JSONDecodeError:
             LOGGER.debug("Petrovich __NEXT_DATA__ decode failed", extra={"url": url})
             return None
@@ -427,45 +489,32 @@ class PetrovichParser(BaseParser):
 
         return None
 
-    def _price_from_data_attributes(self, soup: BeautifulSoup, url: str | None) -> Optional[Decimal]:
+    def _price_from_data_attributes(self, doc: etree._Element, url: str | None) -> Optional[Decimal]:
         best: Optional[Tuple[int, Decimal, str]] = None
-        for element in soup.find_all(True):
-            attrs = getattr(element, "attrs", {})
-            for attr, raw_value in attrs.items():
-                if not isinstance(attr, str):
-                    continue
+        # libxml2 narrows the walk to elements that carry a data-*price/cost attribute.
+        for element in DATA_PRICE_ELEMENTS_XPATH(doc):
+            for attr, raw_value in element.attrib.items():
                 attr_lower = attr.lower()
-                if attr_lower in {"class", "style"}:
-                    continue
                 if not attr_lower.startswith("data"):
                     continue
                 if not any(keyword in attr_lower for keyword in ("price", "cost")):
                     continue
 
-                values: Sequence[str]
-                if isinstance(raw_value, (list, tuple)):
-                    values = [str(item) for item in raw_value if item is not None]
-                elif raw_value is None:
+                candidate = _extract_price_from_text(f"{attr_lower} {raw_value}", prefer_regular=True)
+                if candidate is None:
                     continue
-                else:
-                    values = [str(raw_value)]
-
-                for value in values:
-                    candidate = _extract_price_from_text(f"{attr_lower} {value}", prefer_regular=True)
-                    if candidate is None:
-                        continue
-
-                    priority = 2
-                    if any(token in attr_lower for token in ("retail", "regular", "default", "base", "withoutcard", "nocard", "cardless")):
-                        priority = 0
-                    elif any(token in attr_lower for token in ("min", "max", "old", "previous", "discount")):
-                        priority = 3
-                    elif any(token in attr_lower for token in ("card", "bonus", "loyal", "club")) and not any(token in attr_lower for token in ("without", "no_", "nocard", "cardless")):
-                        priority = 4
-
-                    current = (priority, candidate, attr_lower)
-                    if best is None or current < best:
-                        best = current
+
+                priority = 2
+                if any(token in attr_lower for token in ("retail", "regular", "default", "base", "withoutcard", "nocard", "cardless")):
+                    priority = 0
+                elif any(token in attr_lower for token in ("min", "max", "old", "previous", "discount")):
+                    priority = 3
+                elif any(token in attr_lower for token in ("card", "bonus", "loyal", "club")) and not any(token in attr_lower for token in ("without", "no_", "nocard", "cardless")):
+                    priority = 4
+
+                current = (priority, candidate, attr_lower)
+                if best is None or current < best:
+                    best = current
 
         if best is not None:
             _, price, attr_name = best
@@ -473,21 +522,5 @@ class PetrovichParser(BaseParser):
             return price
         return None
 
-    def _iter_dicts(self, data: object) -> Iterator[dict]:
-        if isinstance(data, dict):
-            yield data
-            for value in data.values():
-                yield from self._iter_dicts(value)
-        elif isinstance(data, list):
-            for item in data:
-                yield from self._iter_dicts(item)
-
-    def _is_product_type(self, value: object) -> bool:
-        if isinstance(value, str):
-            return value.lower() == "product"
-        if isinstance(value, Iterable):
-            return any(isinstance(item, str) and item.lower() == "product" for item in value)
-        return False
-
 
 __all__ = ["PetrovichParser"]
@@ -1,29 +1,50 @@
 """Parser implementation for whitehills.ru."""
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
 import os
 import pathlib
 import random
 import re
+import ssl
+import threading
 import time
-from collections.abc import Iterable
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
+from functools import cached_property, lru_cache
 from typing import Any, Optional
+from urllib.parse import urljoin
 
 import cloudscraper
-from bs4 import BeautifulSoup
-from playwright.async_api import Response, async_playwright
+import httpx
+import orjson
+from lxml import etree
+from playwright.async_api import Browser, BrowserContext, Playwright, Response, async_playwright
 from playwright._impl._api_structures import SetCookieParam
 
 from pricing.config import settings
 
-from .base import BaseParser, PriceNotFoundError, ProductSnapshot, ScraperError
+from .base import (
+    BaseParser,
+    PriceNotFoundError,
+    ProductSnapshot,
+    ScraperError,
+    block_heavy_requests,
+    class_xpath,
+    node_text,
+    parse_html,
+    response_text,
+)
 
 LOGGER = logging.getLogger(__name__)
 
-THIN_SPACES = ("\xa0", "\u2009", "\u202F")
+# Drops every character re's \s matches (thin/no-break spaces included; all of
+# them sit below U+3001) and turns decimal commas into dots, in one pass.
+PRICE_TEXT_TABLE = str.maketrans({**{chr(code): None for code in range(0x3001) if chr(code).isspace()}, ",": "."})
+BASE_URL = "https://whitehills.ru/"
 UA_REAL = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -36,20 +57,198 @@ PW_ARGS = [
 ]
 STORAGE_STATE = os.environ.get("WHITEHILLS_STORAGE_STATE", "/app/whitehills_cookies.json")
 PLAYWRIGHT_TZ = os.environ.get("PLAYWRIGHT_TZ", "Europe/Moscow")
+PLAYWRIGHT_CONTEXT_ARGS: dict[str, Any] = {
+    "locale": "ru-RU",
+    "timezone_id": PLAYWRIGHT_TZ,
+    "user_agent": UA_REAL,
+    "viewport": {"width": 1366, "height": 900},
+}
+AJAX_PROBE_WORKERS = 4
+# Pages whose validators are remembered, and how long a 304 may reuse a price
+# before a full fetch re-reads it.
+CONDITIONAL_PRICES_MAX_ENTRIES = 1024
+CONDITIONAL_PRICES_MAX_AGE_SECONDS = 6 * 3600
+# Learned XHR price endpoints: how many are kept and how long one is replayed
+# before the page itself is fetched again.
+XHR_PRICE_URLS_MAX_ENTRIES = 1024
+XHR_PRICE_URLS_MAX_AGE_SECONDS = 6 * 3600
+PLAYWRIGHT_MAX_CONTEXTS = int(os.environ.get("WHITEHILLS_MAX_CONTEXTS", "3"))
+# Chrome's TLS 1.2 suite order, so the httpx fallback's ClientHello is closer
+# to the browser whose User-Agent it sends (TLS 1.3 suites are fixed by OpenSSL).
+CHROME_TLS12_CIPHERS = ":".join(
+    (
+        "ECDHE-ECDSA-AES128-GCM-SHA256",
+        "ECDHE-RSA-AES128-GCM-SHA256",
+        "ECDHE-ECDSA-AES256-GCM-SHA384",
+        "ECDHE-RSA-AES256-GCM-SHA384",
+        "ECDHE-ECDSA-CHACHA20-POLY1305",
+        "ECDHE-RSA-CHACHA20-POLY1305",
+        "ECDHE-RSA-AES128-SHA",
+        "ECDHE-RSA-AES256-SHA",
+        "AES128-GCM-SHA256",
+        "AES256-GCM-SHA384",
+        "AES128-SHA",
+        "AES256-SHA",
+    )
+)
+PLAYWRIGHT_BROWSER_MAX_USES = int(os.environ.get("WHITEHILLS_BROWSER_MAX_USES", "50"))
 
 
+# Compiled once at import and called directly on a tree.
+PRICE_VALUE_XPATH = etree.XPath(f"//*[{class_xpath('price_value')}]")
+# The static-DOM fallbacks only read the first hit, so (...)[1] keeps libxml2
+# from materialising every price-classed node on large pages.
+SPAN_PRICE_VALUE_XPATH = etree.XPath(f"(//span[{class_xpath('price_value')}])[1]")
+WRAPPED_PRICE_VALUE_XPATH = etree.XPath(
+    f"(//*[{class_xpath('values_wrapper')}]//*[{class_xpath('price_value')}])[1]"
+)
+META_PRICE_CONTENT_XPATH = etree.XPath("//meta[@itemprop='price']/@content", smart_strings=False)
+# meta[itemprop=price], offers' itemprop=price and any price-classed node in
+# one document walk; _price_from_static_dom ranks the hits in that order.
+PRICE_CANDIDATES_XPATH = etree.XPath(
+    "//*[(self::meta and @itemprop='price')"
+    " or (@itemprop='price' and ancestor::*[@itemprop='offers'])"
+    " or contains(@class, 'price')]"
+)
+CATEGORY_CARD_XPATH = etree.XPath(f"//*[{class_xpath('collection__item', 'products-list__item')}]")
+# descendant::...[1] stops at the first match inside each card.
+CATEGORY_LINK_XPATH = etree.XPath("descendant::a[1]")
+# string() hands back the card price text directly, without an element proxy.
+CATEGORY_PRICE_TEXT_XPATH = etree.XPath(
+    f"string(descendant::*[{class_xpath('price', 'product__price')}][1])", smart_strings=False
+)
+SCRIPT_PRICE_PATTERN = re.compile(
+    r'"(?:price|currentPrice|amount|value|priceValue)"\s*:\s*"?(\d+(?:[.,]\d{1,2})?)"?'
+)
+# Cheap libxml2-side probe for the SCRIPT_PRICE_PATTERN keys, so analytics
+# and loader scripts never reach the Python regex.
+SCRIPT_PROBE_XPATH = etree.XPath(
+    "//script[contains(., 'price') or contains(., 'Price')"
+    " or contains(., 'amount') or contains(., 'value')]"
+)
+# Visible .price_value texts and [itemprop=price] content attributes in one
+# CDP round trip; visibility mirrors Playwright's :visible (a box, not hidden).
+PRICE_NODES_SCRIPT = """
+() => ({
+  texts: Array.from(document.querySelectorAll('.price_value'))
+    .filter(e => e.getClientRects().length > 0 && getComputedStyle(e).visibility !== 'hidden')
+    .map(e => e.textContent || ''),
+  metaContents: Array.from(document.querySelectorAll("[itemprop='price'][content]"))
+    .map(e => e.getAttribute('content') || ''),
+})
+"""
+OVERLAY_SELECTORS = (
+    "button.cookie-agree",
+    "button[class*='cookie']",
+    ".cookie__button",
+    ".agree",
+    "button[aria-label='Принять']",
+    ".region-confirm button",
+    "button[data-accept]",
+)
+# Selector and marker lists are baked into the scripts once at import, so
+# each evaluate sends a constant source and no per-call arguments.
+VISIBLE_OVERLAYS_SCRIPT = f"""
+() => {orjson.dumps(OVERLAY_SELECTORS).decode()}.filter(selector => {{
+  const e = document.querySelector(selector);
+  return !!e && e.getClientRects().length > 0 && getComputedStyle(e).visibility !== 'hidden';
+}})
+"""
+# Price nodes only: a static ld+json block (a BreadcrumbList, say) is there at
+# domcontentloaded and would release the wait before the JS price renders.
+# This wait is the only gate before the DOM probe reads the price.
+PRICE_READY_SELECTOR = ".price_value, [itemprop='price']"
+PLAIN_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+CURRENCY_PATTERN = re.compile(r"(руб\.?|₽|р\.)", re.I)
+# The static-page probes run on the raw response bytes; only their small
+# captures are decoded, and the body is decoded only when they all miss.
+META_PRICE_PATTERN = re.compile(
+    rb'<meta[^>]*itemprop=["\']price["\'][^>]*content=["\']([^"\']+)["\']', re.I
+)
+SPAN_PRICE_PATTERN = re.compile(
+    rb'<span[^>]*class=["\'][^"\']*price_value[^"\']*["\'][^>]*>(.*?)</span>', re.I | re.S
+)
+AJAX_URL_PATTERN = re.compile(rb'https?://[^\s"\']+?(?:ajax|price)[^\s"\']*', re.I)
+# Bounded repeats keep the raw-body fallbacks linear on captcha/garbage pages.
+TEXT_PRICE_CLASS_PATTERN = re.compile(
+    r"class=[\"'][^\"']{0,80}price_value[^\"']{0,80}[\"']\s*>\s*([^<]{1,40})", re.I
+)
+TEXT_PRICE_CURRENCY_PATTERN = re.compile(r"(\d[\d\s\u2009\u202F\xa0]{0,20})\s*(?:₽|руб\.?)", re.I)
+# The same two probes over raw UTF-8 bytes, so an XHR body that is not JSON
+# is never decoded whole. re.I does not fold Cyrillic in bytes, and \s only
+# covers ASCII there, so no-break/thin spaces and "РУБ" are spelled out.
+_UTF8_SPACE = rb"(?:\s|\xc2\xa0|\xe2\x80[\x89\xaf])"
+TEXT_PRICE_CLASS_BYTES_PATTERN = re.compile(
+    rb"class=[\"'][^\"']{0,80}price_value[^\"']{0,80}[\"']\s*>\s*([^<]{1,40})", re.I
+)
+TEXT_PRICE_CURRENCY_BYTES_PATTERN = re.compile(
+    rb"(\d(?:\d|" + _UTF8_SPACE + rb"){0,20})" + _UTF8_SPACE + rb"*"
+    rb"(?:\xe2\x82\xbd|(?:\xd1\x80|\xd0\xa0)(?:\xd1\x83|\xd0\xa3)(?:\xd0\xb1|\xd0\x91))"
+)
+PRICE_SUBTREE_KEYS = frozenset({"offers", "product", "price"})
+CAPTCHA_MARKERS = ("если вы человек", "captcha", "капча")
+# ld+json texts and the captcha check for a Playwright miss, evaluated in the
+# page so the serialised DOM does not have to cross CDP.
+PAGE_MISS_PROBE_SCRIPT = f"""
+() => {{
+  const html = document.documentElement ? document.documentElement.outerHTML.toLowerCase() : '';
+  return {{
+    jsonld: Array.from(document.querySelectorAll('script[type="application/ld+json"]'))
+      .map(e => e.textContent || ''),
+    captcha: {orjson.dumps(CAPTCHA_MARKERS).decode()}.some(marker => html.includes(marker)),
+  }};
+}}
+"""
+PRODUCT_TYPES = frozenset({"product", "http://schema.org/product", "https://schema.org/product"})
+JSON_START_PATTERN = re.compile(r"\s*[\[{]")
+JSONLD_SCRIPT_PATTERN = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.I | re.S,
+)
+
+
+def _decode_jsonld_texts(texts: Iterable[str]) -> list[Any]:
+    blocks: list[Any] = []
+    for text in texts:
+        # Every consumer reads prices from "offers"; BreadcrumbList, WebSite and
+        # Organization blocks are skipped without being decoded.
+        if '"offers"' not in text or not JSON_START_PATTERN.match(text):
+            continue
+        try:
+            blocks.append(orjson.loads(text))
+        except ValueError:
+            continue
+    return blocks
+
+
+class _StaticPage:
+    """One fetched document, decoded once and handed to every price path that reads it.
+
+    The ld+json blocks and the lxml tree are built on first use only.
+    """
+
+    def __init__(self, html: str) -> None:
+        self.html = html
+
+    @cached_property
+    def jsonld_blocks(self) -> list[Any]:
+        return _decode_jsonld_texts(JSONLD_SCRIPT_PATTERN.findall(self.html))
+
+    @cached_property
+    def tree(self) -> etree._Element | None:
+        return parse_html(self.html)
+
+
+@lru_cache(maxsize=4096)
 def _norm_price(txt: str) -> Decimal:
-    t = txt or ""
-    for sp in THIN_SPACES:
-        t = t.replace(sp, " ")
-    t = re.sub(r"(руб\.?|₽|р\.)", "", t, flags=re.I)
-    t = re.sub(r"\s+", "", t).replace(",", ".")
-    match = re.search(r"\d+(?:\.\d+)?", t)
+    t = CURRENCY_PATTERN.sub("", txt or "").translate(PRICE_TEXT_TABLE)
+    match = PLAIN_NUMBER_PATTERN.search(t)
     if not match:
         raise ValueError(f"no number in: {txt!r}")
     return Decimal(match.group(0))
 
 
+@lru_cache(maxsize=1)
 def _ensure_tmp_dir() -> str:
     directory = "/app/tmp"
     try:
@@ -60,12 +259,27 @@ def _ensure_tmp_dir() -> str:
     return directory
 
 
-def _load_storage_state(path: str) -> dict[str, Any] | None:
-    if not path or not os.path.exists(path):
-        return None
+def _load_storage_state(path: str) -> tuple[dict[str, str], list[SetCookieParam]]:
+    """Cloudscraper headers and Playwright cookies from the storage state; reread only when the file changes."""
+
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns if path else None
+    except OSError:
+        mtime_ns = None
+    return _storage_snapshot(path, mtime_ns)
+
+
+@lru_cache(maxsize=4)
+def _storage_snapshot(path: str, mtime_ns: int | None) -> tuple[dict[str, str], list[SetCookieParam]]:
+    storage_state = _read_storage_state(path) if mtime_ns is not None else None
+    cookies = _storage_cookies_for_domain(storage_state)
+    return _scraper_headers(cookies), _playwright_cookies(cookies)
+
+
+def _read_storage_state(path: str) -> dict[str, Any] | None:
     try:
-        with open(path, "r", encoding="utf-8") as handle:
-            data = json.load(handle)
+        with open(path, "rb") as handle:
+            data = orjson.loads(handle.read())
         if isinstance(data, dict):
             return data
     except Exception as exc:
@@ -93,8 +307,7 @@ def _storage_cookies_for_domain(storage_state: dict[str, Any] | None) -> list[di
     return result
 
 
-def _cookie_header_from_storage(storage_state: dict[str, Any] | None) -> str | None:
-    cookies = _storage_cookies_for_domain(storage_state)
+def _cookie_header(cookies: list[dict[str, Any]]) -> str | None:
     pairs: list[str] = []
     for cookie in cookies:
         name = cookie.get("name")
@@ -105,6 +318,29 @@ def _cookie_header_from_storage(storage_state: dict[str, Any] | None) -> str | N
     return "; ".join(pairs) if pairs else None
 
 
+def _playwright_cookies(cookies: list[dict[str, Any]]) -> list[SetCookieParam]:
+    result: list[SetCookieParam] = []
+    for cookie in cookies:
+        name = cookie.get("name")
+        value = cookie.get("value")
+        if name is None or value is None:
+            continue
+        domain = cookie.get("domain") or "whitehills.ru"
+        if not domain.startswith("."):
+            domain = f".{domain}"
+        cookie_param: SetCookieParam = {
+            "name": name,
+            "value": value,
+            "domain": domain,
+            "path": cookie.get("path") or "/",
+        }
+        for key in ("expires", "httpOnly", "secure", "sameSite"):
+            if cookie.get(key) is not None:
+                cookie_param[key] = cookie[key]  # type: ignore[literal-required]
+        result.append(cookie_param)
+    return result
+
+
 def _random_delay_ms() -> int:
     return random.randint(500, 1200)
 
@@ -117,247 +353,396 @@ async def _human_pause(page) -> None:
 
 
 async def _dismiss_overlays(page):
-    selectors = [
-        "button.cookie-agree",
-        "button[class*='cookie']",
-        ".cookie__button",
-        ".agree",
-        "button[aria-label='Принять']",
-        ".region-confirm button",
-        "button[data-accept]",
-    ]
-    for selector in selectors:
+    # One evaluate reports which overlay buttons are visible instead of an
+    # is_visible() round-trip per selector; only those get clicked.
+    try:
+        visible = await page.evaluate(VISIBLE_OVERLAYS_SCRIPT)
+    except Exception:
+        return
+    for selector in visible or []:
         try:
-            button = page.locator(selector).first
-            if await button.is_visible():
-                await button.click(timeout=1000)
-                await _human_pause(page)
+            await page.locator(selector).first.click(timeout=1000)
+            await _human_pause(page)
         except Exception:
             continue
 
 
-def _extract_price_from_text(body: str) -> Optional[Decimal]:
+def _extract_price_from_text(body: str | bytes) -> Optional[Decimal]:
+    # orjson reads raw response bytes; they are only decoded for the regex fallback.
     try:
-        data = json.loads(body)
+        data = orjson.loads(body)
         stack = [data]
         while stack:
             current = stack.pop()
             if isinstance(current, dict):
+                likely: list[Any] = []
                 for key, value in current.items():
                     if isinstance(value, (dict, list)):
-                        stack.append(value)
-                    elif isinstance(value, (int, float, str)) and re.search(r"price", key, re.I):
+                        if key.lower() in PRICE_SUBTREE_KEYS:
+                            likely.append(value)
+                        else:
+                            stack.append(value)
+                    elif isinstance(value, (int, float, str)) and "price" in key.lower():
                         try:
-                            return _norm_price(str(value))
+                            price = _norm_price(str(value))
                         except Exception:
-                            pass
+                            continue
+                        # totalPrice: 0 and the like belong to carts, not products.
+                        if price > 0:
+                            return price
+                # Pushed last so offers/product/price subtrees are walked first.
+                stack.extend(likely)
             elif isinstance(current, list):
                 stack.extend(current)
     except Exception:
-        match = re.search(
-            r"(?:class=[\"'][^\"']*price_value[^\"']*[\"']\s*>\s*)([^<]+)|(\d[\d\s\u2009\u202F\xa0]*\s*(?:₽|руб\.?))",
-            body,
-            flags=re.I,
-        )
-        if match:
-            group = match.group(1) or match.group(2)
-            try:
-                return _norm_price(group)
-            except Exception:
-                pass
+        if isinstance(body, bytes):
+            patterns = (TEXT_PRICE_CLASS_BYTES_PATTERN, TEXT_PRICE_CURRENCY_BYTES_PATTERN)
+        else:
+            patterns = (TEXT_PRICE_CLASS_PATTERN, TEXT_PRICE_CURRENCY_PATTERN)
+        for pattern in patterns:
+            match = pattern.search(body)
+            if match:
+                value = match.group(1)
+                try:
+                    # Only the short capture is decoded.
+                    price = _norm_price(value.decode("utf-8", "replace") if isinstance(value, bytes) else value)
+                except Exception:
+                    continue
+                if price > 0:
+                    return price
     return None
 
 
-def _log_price_nodes_from_html(html: str, logger) -> None:
+def _log_price_nodes(page: _StaticPage, logger) -> None:
+    if not logger.isEnabledFor(logging.INFO):
+        return
     try:
-        soup = BeautifulSoup(html, "lxml")
+        doc = page.tree
     except Exception:
         return
     texts: list[str] = []
-    for element in soup.select(".price_value"):
-        text = (element.get_text(" ", strip=True) or "").strip()
-        if text:
-            texts.append(text[:60])
+    if doc is not None:
+        for element in PRICE_VALUE_XPATH(doc):
+            text = node_text(element)
+            if text:
+                texts.append(text[:60])
     logger.info("whitehills: .price_value nodes=%s texts=%s", len(texts), texts)
 
 
 def _captcha_detected(text: str) -> bool:
     lowered = text.lower()
-    if "если вы человек" in lowered:
-        return True
-    if "captcha" in lowered or "капча" in lowered:
-        return True
-    return False
+    return any(marker in lowered for marker in CAPTCHA_MARKERS)
+
+
+def _create_scraper():
+    return cloudscraper.create_scraper(
+        browser={"browser": "chrome", "platform": "windows", "mobile": False},
+        delay=10,
+    )
+
+
+def _clone_scraper(scraper):
+    # A session for one worker thread; cookies (a locked jar) and headers are
+    # shared with the original, the connection pool and challenge state are not.
+    return cloudscraper.create_scraper(
+        sess=scraper,
+        browser={"browser": "chrome", "platform": "windows", "mobile": False},
+        delay=10,
+    )
+
+
+def _scraper_headers(cookies: list[dict[str, Any]]) -> dict[str, str]:
+    headers = {"User-Agent": UA_REAL, "Accept-Language": "ru-RU,ru;q=0.9"}
+    cookie_header = _cookie_header(cookies)
+    if cookie_header:
+        headers["Cookie"] = cookie_header
+    return headers
 
 
-def _price_via_cloudscraper(url: str, logger, storage_state: dict[str, Any] | None) -> Optional[Decimal]:
+def _price_via_known_xhr(
+    xhr_url: str,
+    logger,
+    headers: dict[str, str],
+    scraper,
+) -> Optional[Decimal]:
     try:
-        scraper = cloudscraper.create_scraper(
-            browser={"browser": "chrome", "platform": "windows", "mobile": False},
-            delay=10,
-        )
-        headers = {"User-Agent": UA_REAL, "Accept-Language": "ru-RU,ru;q=0.9"}
-        cookie_header = _cookie_header_from_storage(storage_state)
-        if cookie_header:
-            headers["Cookie"] = cookie_header
-        response = scraper.get(url, headers=headers, timeout=25)
+        response = scraper.get(xhr_url, headers=headers, timeout=15)
         if response.status_code != 200:
-            logger.info("whitehills cloudscraper status=%s", response.status_code)
+            logger.info("whitehills xhr status=%s", response.status_code)
             return None
-        html = response.text or ""
+        return _extract_price_from_text(response.content)
+    except Exception as exc:
+        logger.info("whitehills xhr error: %s", exc)
+        return None
 
-        if _captcha_detected(html):
-            logger.warning("whitehills: captcha detected (cloudscraper)")
 
-        _log_price_nodes_from_html(html, logger)
+def _probe_ajax_url(candidate_url: str, headers: dict[str, str], scraper) -> Optional[Decimal]:
+    try:
+        response = scraper.get(candidate_url, headers=headers, timeout=15)
+        if response.status_code != 200:
+            return None
+        return _extract_price_from_text(response.content)
+    except Exception:
+        return None
 
-        match = re.search(
-            r'<meta[^>]*itemprop=["\']price["\'][^>]*content=["\']([^"\']+)["\']',
-            html,
-            flags=re.I,
-        )
-        if match:
-            return _norm_price(match.group(1))
 
-        match = re.search(
-            r'<span[^>]*class=["\'][^"\']*price_value[^"\']*["\'][^>]*>(.*?)</span>',
-            html,
-            flags=re.I | re.S,
-        )
+def _price_via_ajax_candidates(candidate_urls: list[str], headers: dict[str, str], scraper) -> Optional[Decimal]:
+    if len(candidate_urls) <= 1:
+        return _probe_ajax_url(candidate_urls[0], headers, scraper) if candidate_urls else None
+    # Up to AJAX_PROBE_WORKERS probes in flight; the earliest candidate that
+    # yields a price wins, so the result does not depend on response timing,
+    # and the queued rest are cancelled. requests sessions are not
+    # thread-safe, so every worker probes through its own clone.
+    workers = threading.local()
+
+    def probe(candidate_url: str) -> Optional[Decimal]:
+        worker_scraper = getattr(workers, "scraper", None)
+        if worker_scraper is None:
+            worker_scraper = workers.scraper = _clone_scraper(scraper)
+        return _probe_ajax_url(candidate_url, headers, worker_scraper)
+
+    executor = ThreadPoolExecutor(max_workers=min(AJAX_PROBE_WORKERS, len(candidate_urls)))
+    try:
+        futures = [executor.submit(probe, candidate_url) for candidate_url in candidate_urls]
+        for future in futures:
+            price = future.result()
+            if price is not None:
+                return price
+        return None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _price_from_raw_html(
+    response,
+    logger,
+    source: str,
+    price_from_page: Callable[[_StaticPage], Optional[Decimal]] | None = None,
+) -> Optional[Decimal]:
+    content = response.content or b""
+    for pattern in (META_PRICE_PATTERN, SPAN_PRICE_PATTERN):
+        match = pattern.search(content)
         if match:
-            return _norm_price(match.group(1))
+            return _norm_price(match.group(1).decode("utf-8", "replace"))
 
-        scripts = re.findall(
-            r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
-            html,
-            flags=re.I | re.S,
-        )
-        for raw_json in scripts:
-            try:
-                data = json.loads(raw_json)
-            except Exception:
-                continue
-            candidates = data if isinstance(data, list) else [data]
-            for obj in candidates:
-                if not isinstance(obj, dict):
-                    continue
-                offers = obj.get("offers")
-                if not offers:
-                    continue
-                offer_list = offers if isinstance(offers, list) else [offers]
-                for offer in offer_list:
-                    if isinstance(offer, dict) and "price" in offer:
-                        try:
-                            return _norm_price(str(offer["price"]))
-                        except Exception:
-                            pass
+    page = _StaticPage(response_text(response) or "")
+    price = _jsonld_offers_price(page.jsonld_blocks)
+    if price is not None:
+        return price
 
-        for candidate_url in re.findall(
-            r'https?://[^\s"\']+?(?:ajax|price)[^\s"\']*',
-            html,
-            flags=re.I,
-        ):
-            try:
-                ajax_resp = scraper.get(candidate_url, headers=headers, timeout=15)
-                if ajax_resp.status_code != 200:
-                    continue
-                extracted = _extract_price_from_text(ajax_resp.text)
-                if extracted is not None:
-                    return extracted
-            except Exception:
-                continue
+    # Only pages that the raw-HTML probes could not price get the captcha
+    # scan (a lower() copy of the page) and a DOM build.
+    captcha = _captcha_detected(page.html)
+    if captcha:
+        logger.warning("whitehills: captcha detected (%s)", source)
+    _log_price_nodes(page, logger)
 
-        return None
+    if price_from_page is not None and not captcha:
+        return price_from_page(page)
+    return None
+
+
+class _ExpiringLRU:
+    """Thread-safe LRU map whose entries expire ``max_age`` seconds after being stored."""
+
+    def __init__(self, max_entries: int, max_age: float) -> None:
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._items: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if time.monotonic() - item[1] > self.max_age:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._items[key] = (value, time.monotonic())
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+
+# product URL -> XHR URL whose price matched the rendered page on a Playwright run
+_XHR_PRICE_URLS = _ExpiringLRU(XHR_PRICE_URLS_MAX_ENTRIES, XHR_PRICE_URLS_MAX_AGE_SECONDS)
+
+
+# product URL -> (conditional request headers, price read from that page version);
+# shared by the to_thread workers of a parallel batch, hence the locked map.
+_CONDITIONAL_PRICES = _ExpiringLRU(CONDITIONAL_PRICES_MAX_ENTRIES, CONDITIONAL_PRICES_MAX_AGE_SECONDS)
+
+
+def _remember_validators(url: str, response_headers, price: Decimal) -> None:
+    # Only prices read from the page itself are tied to its ETag/Last-Modified;
+    # an ajax-probe price can change while the page stays the same.
+    validators: dict[str, str] = {}
+    if "no-store" not in (response_headers.get("Cache-Control") or ""):
+        if response_headers.get("ETag"):
+            validators["If-None-Match"] = response_headers["ETag"]
+        if response_headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = response_headers["Last-Modified"]
+    if validators:
+        _CONDITIONAL_PRICES.put(url, (validators, price))
+    else:
+        _CONDITIONAL_PRICES.pop(url)
+
+
+def _price_via_cloudscraper(
+    url: str,
+    logger,
+    headers: dict[str, str],
+    scraper,
+    price_from_page: Callable[[_StaticPage], Optional[Decimal]] | None = None,
+) -> tuple[Optional[Decimal], bool]:
+    """Price from the static page, and whether the page itself was fetched."""
+
+    fetched = False
+    try:
+        cached = _CONDITIONAL_PRICES.get(url)
+        # The validators belong to the page request only, not the ajax probes.
+        page_headers = {**headers, **cached[0]} if cached is not None else headers
+        response = scraper.get(url, headers=page_headers, timeout=25)
+        if response.status_code == 304 and cached is not None:
+            logger.info("whitehills: page not modified, reusing price %s", cached[1])
+            # The server vouched for this version again; restart its max age.
+            _CONDITIONAL_PRICES.put(url, cached)
+            return cached[1], True
+        if response.status_code != 200:
+            logger.info("whitehills cloudscraper status=%s", response.status_code)
+            return None, fetched
+        fetched = True
+
+        price = _price_from_raw_html(response, logger, "cloudscraper", price_from_page)
+        if price is not None:
+            _remember_validators(url, response.headers, price)
+            return price, fetched
+
+        candidate_urls = [
+            candidate.decode("utf-8", "replace")
+            for candidate in dict.fromkeys(AJAX_URL_PATTERN.findall(response.content or b""))
+        ]
+        return _price_via_ajax_candidates(candidate_urls, headers, scraper), fetched
     except Exception as exc:
         logger.info("whitehills cloudscraper error: %s", exc)
-        return None
+        return None, fetched
 
 
-async def _price_from_dom(page, logger) -> Optional[Decimal]:
-    await _dismiss_overlays(page)
-    try:
-        await page.wait_for_load_state("networkidle")
-    except Exception:
-        pass
+@lru_cache(maxsize=1)
+def _httpx_ssl_context() -> ssl.SSLContext:
+    """SSL context for the httpx fallback, built once.
 
+    httpx would otherwise load the CA bundle again for every client (~20 ms).
+    """
+
+    context = httpx.create_ssl_context()
+    context.set_ciphers(CHROME_TLS12_CIPHERS)
+    return context
+
+
+async def _price_via_httpx(
+    url: str,
+    logger,
+    headers: dict[str, str],
+    price_from_page: Callable[[_StaticPage], Optional[Decimal]] | None = None,
+) -> Optional[Decimal]:
     try:
-        locator = page.locator(".price_value")
-        count = await locator.count()
-        values: list[str] = []
-        for index in range(count):
-            text = (await locator.nth(index).text_content() or "").strip()
-            if text:
-                values.append(text[:60])
-        logger.info("whitehills: dom .price_value nodes=%s texts=%s", count, values)
-    except Exception:
-        logger.info("whitehills: failed to log .price_value nodes")
+        async with httpx.AsyncClient(
+            headers=headers, timeout=10, follow_redirects=True, verify=_httpx_ssl_context()
+        ) as client:
+            response = await client.get(url)
+        if response.status_code != 200:
+            logger.info("whitehills httpx status=%s", response.status_code)
+            return None
+        return _price_from_raw_html(response, logger, "httpx", price_from_page)
+    except Exception as exc:
+        logger.info("whitehills httpx error: %s", exc)
+        return None
 
-    selectors = [
-        ".price_value",
-        ".values_wrapper .price_value",
-        "[itemprop='price']",
-        ".prices_block .price_value",
-    ]
 
-    for css in selectors:
+async def _price_from_dom(page, logger) -> Optional[Decimal]:
+    # The caller has already waited for the price nodes (or the network
+    # price) via _wait_for_price_or_network; a second selector wait here
+    # only added up to 5s more on pages that never render them.
+    # One evaluate returns every candidate; .values_wrapper/.prices_block
+    # variants are subsets of .price_value, so that selector covers them.
+    try:
+        candidates = await page.evaluate(PRICE_NODES_SCRIPT)
+    except Exception:
+        candidates = {}
+    texts = [text.strip() for text in candidates.get("texts") or []]
+    logger.info("whitehills: dom visible .price_value texts=%s", [text[:60] for text in texts])
+    for value in texts + [value.strip() for value in candidates.get("metaContents") or []]:
+        if not value:
+            continue
         try:
-            locator = page.locator(css)
-            count = await locator.count()
+            return _norm_price(value)
         except Exception:
             continue
-        if count == 0:
-            continue
-        if css == "[itemprop='price']":
-            for index in range(count):
-                try:
-                    element = locator.nth(index)
-                    value = (await element.get_attribute("content")) or ""
-                    value = value.strip()
-                    if not value:
-                        continue
-                    return _norm_price(value)
-                except Exception:
-                    continue
-            continue
-        for index in range(count):
-            try:
-                element = locator.nth(index)
-                if not await element.is_visible():
-                    continue
-                text = (await element.text_content()) or ""
-                text = text.strip()
-                if not text:
-                    continue
-                return _norm_price(text)
-            except Exception:
-                continue
 
     return None
 
 
-def _price_from_jsonld(html_or_texts, logger) -> Decimal | None:
-    if isinstance(html_or_texts, str):
-        json_texts = re.findall(
-            r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
-            html_or_texts,
-            flags=re.I | re.S,
-        )
-    else:
-        json_texts = [text for text in html_or_texts if text]
+async def _wait_for_price_or_network(page, network_price_found: asyncio.Event, timeout_ms: int) -> None:
+    if network_price_found.is_set():
+        return
+    selector_task = asyncio.create_task(page.wait_for_selector(PRICE_READY_SELECTOR, timeout=timeout_ms))
+    network_task = asyncio.create_task(network_price_found.wait())
+    _, pending = await asyncio.wait({selector_task, network_task}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(selector_task, network_task, return_exceptions=True)
+
+
+async def _price_from_dom_unless_network(page, network_price_found: asyncio.Event, logger) -> Optional[Decimal]:
+    if network_price_found.is_set():
+        return None
+    dom_task = asyncio.create_task(_price_from_dom(page, logger))
+    network_task = asyncio.create_task(network_price_found.wait())
+    done, pending = await asyncio.wait({dom_task, network_task}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    if dom_task not in done:
+        logger.info("whitehills: network price arrived, DOM probe cancelled")
+        return None
+    return dom_task.result()
 
-    for raw_text in json_texts:
-        try:
-            data = json.loads(raw_text)
-        except Exception:
-            continue
 
+async def _page_price(page, logger) -> Optional[Decimal]:
+    """Price from the rendered page alone: DOM price nodes, then JSON-LD offers."""
+
+    price = await _price_from_dom(page, logger)
+    if price is not None:
+        return price
+    try:
+        probe = await page.evaluate(PAGE_MISS_PROBE_SCRIPT)
+    except Exception:
+        return None
+    return _jsonld_offers_price(_decode_jsonld_texts(probe.get("jsonld") or []))
+
+
+def _jsonld_offers_price(blocks: Iterable[Any]) -> Decimal | None:
+    for data in blocks:
         objects = data if isinstance(data, list) else [data]
+        # Yoast-style pages wrap the Product in an @graph next to WebPage and
+        # BreadcrumbList nodes; without this they fell through to the DOM path.
+        if isinstance(data, dict) and isinstance(data.get("@graph"), list):
+            objects = data["@graph"]
         for obj in objects:
             if not isinstance(obj, dict):
                 continue
             offers = obj.get("offers")
-            if not offers and obj.get("@type") == "Product":
-                offers = obj.get("offers")
             if not offers:
                 continue
             offers_list = offers if isinstance(offers, list) else [offers]
@@ -395,6 +780,112 @@ async def _dump_debug(page, logger) -> None:
         logger.warning("whitehills: failed to store debug info: %s", exc)
 
 
+class _BrowserPool:
+    """Chromium instance shared by WhiteHills fetches running on one event loop.
+
+    Each fetch gets its own short-lived context; at most ``PLAYWRIGHT_MAX_CONTEXTS``
+    are open at once so a large batch does not pile pages onto one browser.
+    After ``PLAYWRIGHT_BROWSER_MAX_USES`` contexts the browser is relaunched so
+    a long-running worker does not keep growing one Chromium process.
+
+    Every parser that acquires a context becomes an owner; the browser is
+    stopped when the last owner closes, so one service shutting down does not
+    pull contexts from under another.
+    """
+
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock: asyncio.Lock | None = None
+        self._contexts: asyncio.Semaphore | None = None
+        self._playwright: Playwright | None = None
+        self._browser: Browser | None = None
+        self._uses = 0
+        self._owners: set[object] = set()
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Playwright objects are bound to the loop that created them.
+            if self._browser is not None:
+                LOGGER.warning("whitehills: browser of a previous event loop was never closed")
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._contexts = asyncio.Semaphore(PLAYWRIGHT_MAX_CONTEXTS)
+            self._playwright = None
+            self._browser = None
+            self._uses = 0
+            self._owners = set()
+
+    async def browser(self, *, headless: bool, slow_mo: int) -> Browser:
+        self._bind_loop()
+        assert self._lock is not None
+        async with self._lock:
+            if self._browser is not None and self._uses >= PLAYWRIGHT_BROWSER_MAX_USES:
+                retired, self._browser = self._browser, None
+                # Contexts still open on it close the browser on release.
+                if not retired.contexts:
+                    await retired.close()
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(
+                    headless=headless,
+                    slow_mo=slow_mo,
+                    args=PW_ARGS,
+                )
+                self._uses = 0
+            self._uses += 1
+            return self._browser
+
+    async def acquire_context(
+        self, owner: object, *, headless: bool, slow_mo: int, **context_args: Any
+    ) -> BrowserContext:
+        self._bind_loop()
+        self._owners.add(owner)
+        contexts = self._contexts
+        assert contexts is not None
+        await contexts.acquire()
+        try:
+            browser = await self.browser(headless=headless, slow_mo=slow_mo)
+            return await browser.new_context(**context_args)
+        except BaseException:
+            contexts.release()
+            raise
+
+    async def release_context(self, context: BrowserContext) -> None:
+        browser = context.browser
+        try:
+            await context.close()
+            if browser is not None and browser is not self._browser and not browser.contexts:
+                await browser.close()
+        finally:
+            if self._contexts is not None:
+                self._contexts.release()
+
+    async def close(self, owner: object) -> None:
+        if owner not in self._owners:
+            return
+        if self._loop is not asyncio.get_running_loop():
+            raise RuntimeError("WhiteHills browser pool must be closed on the event loop that opened it")
+        self._owners.discard(owner)
+        if self._owners:
+            return
+        browser, playwright_ctx = self._browser, self._playwright
+        self._loop = None
+        self._browser = None
+        self._playwright = None
+        self._uses = 0
+        try:
+            if browser is not None:
+                await browser.close()
+        finally:
+            if playwright_ctx is not None:
+                await playwright_ctx.stop()
+
+
+_BROWSER_POOL = _BrowserPool()
+
+
 class WhiteHillsParser(BaseParser):
     """Parser for WhiteHills store."""
 
@@ -402,14 +893,66 @@ class WhiteHillsParser(BaseParser):
     def logger(self) -> logging.Logger:
         return LOGGER
 
+    def __init__(self) -> None:
+        super().__init__()
+        self._static_scraper = None
+
+    def _get_static_scraper(self):
+        # One session per parser keeps connections to whitehills.ru alive
+        # across products instead of a new TLS handshake per fetch.
+        if self._static_scraper is None:
+            self._static_scraper = _create_scraper()
+        return self._static_scraper
+
+    async def close(self) -> None:
+        if self._static_scraper is not None:
+            self._static_scraper.close()
+            self._static_scraper = None
+        await _BROWSER_POOL.close(self)
+
     @staticmethod
     def _to_decimal(text: str) -> Decimal:
         return _norm_price(text)
 
     async def fetch_product(self, url: str, *, variant: Optional[str] = None) -> ProductSnapshot:
-        storage_state_data = _load_storage_state(STORAGE_STATE)
+        scraper_headers, manual_cookies = _load_storage_state(STORAGE_STATE)
 
-        price = _price_via_cloudscraper(url, self.logger, storage_state_data)
+        xhr_url = _XHR_PRICE_URLS.get(url)
+        if xhr_url:
+            price = await asyncio.to_thread(
+                _price_via_known_xhr, xhr_url, self.logger, scraper_headers, self._get_static_scraper()
+            )
+            if price is not None:
+                self.logger.info("whitehills: price via known xhr = %s", price)
+                return ProductSnapshot(
+                    url=url,
+                    price=price,
+                    currency="RUB",
+                    title=None,
+                    variant_key=variant,
+                    payload=None,
+                )
+            _XHR_PRICE_URLS.pop(url)
+
+        # Before the browser only confident sources (JSON-LD offers,
+        # .price_value, meta[itemprop=price]) may settle the price; the pages
+        # are kept for the heuristic fallbacks in case Playwright misses too.
+        static_pages: list[_StaticPage] = []
+
+        def confident_price(page: _StaticPage) -> Optional[Decimal]:
+            static_pages.append(page)
+            return self._price_from_page(page, url=url, confident_only=True)
+
+        # Blocking cloudscraper I/O runs in a worker thread so concurrent
+        # fetch_product() tasks are not serialised behind it.
+        price, page_fetched = await asyncio.to_thread(
+            _price_via_cloudscraper,
+            url,
+            self.logger,
+            scraper_headers,
+            self._get_static_scraper(),
+            price_from_page=confident_price,
+        )
         if price is not None:
             self.logger.info("whitehills: price via cloudscraper = %s", price)
             return ProductSnapshot(
@@ -420,6 +963,20 @@ class WhiteHillsParser(BaseParser):
                 variant_key=variant,
                 payload=None,
             )
+        if not page_fetched:
+            # A plain GET with the stored cookies is still far cheaper than a
+            # browser when cloudscraper itself failed to get the page.
+            price = await _price_via_httpx(url, self.logger, scraper_headers, price_from_page=confident_price)
+            if price is not None:
+                self.logger.info("whitehills: price via httpx = %s", price)
+                return ProductSnapshot(
+                    url=url,
+                    price=price,
+                    currency="RUB",
+                    title=None,
+                    variant_key=variant,
+                    payload=None,
+                )
 
         fetch_html_attr = getattr(self, "fetch_html", None)
         original_fetch = getattr(type(self), "fetch_html", None)
@@ -452,110 +1009,111 @@ class WhiteHillsParser(BaseParser):
         result_snapshot: Optional[ProductSnapshot] = None
         page = None
         context = None
-        browser = None
-        debug_dump_saved = False
+        overlay_task: Optional[asyncio.Task] = None
+        # Screenshot + HTML dumps cost seconds per miss; production runs skip them.
+        dump_pending = bool(getattr(settings_obj, "playwright_debug_dumps", False))
 
         try:  # pragma: no cover - requires Playwright
-            async with async_playwright() as playwright_ctx:
-                browser = await playwright_ctx.chromium.launch(
-                    headless=getattr(settings_obj, "playwright_headless", True),
-                    slow_mo=getattr(settings_obj, "playwright_slow_mo", 0),
-                    args=PW_ARGS,
-                )
-                ctx_args: dict[str, Any] = dict(
-                    locale="ru-RU",
-                    timezone_id=PLAYWRIGHT_TZ,
-                    user_agent=UA_REAL,
-                    viewport={"width": 1366, "height": 900},
-                )
-                if os.path.exists(STORAGE_STATE):
-                    ctx_args["storage_state"] = STORAGE_STATE
-                    self.logger.info("whitehills: using storage_state %s", STORAGE_STATE)
-
-                context = await browser.new_context(**ctx_args)
-
-                manual_cookies: list[SetCookieParam] = []
-                for cookie in _storage_cookies_for_domain(storage_state_data):
-                    name = cookie.get("name")
-                    value = cookie.get("value")
-                    if name is None or value is None:
-                        continue
-                    domain = cookie.get("domain") or "whitehills.ru"
-                    if not domain.startswith("."):
-                        domain = f".{domain}"
-                    cookie_kwargs: dict[str, Any] = {
-                        "name": name,
-                        "value": value,
-                        "domain": domain,
-                        "path": cookie.get("path") or "/",
-                    }
-                    for key in ("expires", "httpOnly", "secure", "sameSite"):
-                        if key in cookie and cookie[key] is not None:
-                            cookie_kwargs[key] = cookie[key]
-                    manual_cookies.append(SetCookieParam(**cookie_kwargs))
-
-                if manual_cookies:
-                    try:
-                        await context.add_cookies(manual_cookies)
-                        self.logger.info(
-                            "whitehills: added %s cookies to context", len(manual_cookies)
-                        )
-                    except Exception as exc:
-                        self.logger.info("whitehills: failed to add cookies: %s", exc)
-
-                async def route_handler(route, request):
-                    try:
-                        if request.resource_type in {"image", "font"}:
-                            await route.abort()
-                        else:
-                            await route.continue_()
-                    except Exception:
-                        try:
-                            await route.continue_()
-                        except Exception:
-                            pass
+            ctx_args: dict[str, Any] = dict(PLAYWRIGHT_CONTEXT_ARGS)
+            if os.path.exists(STORAGE_STATE):
+                ctx_args["storage_state"] = STORAGE_STATE
+                self.logger.info("whitehills: using storage_state %s", STORAGE_STATE)
+
+            context = await _BROWSER_POOL.acquire_context(
+                self,
+                headless=getattr(settings_obj, "playwright_headless", True),
+                slow_mo=getattr(settings_obj, "playwright_slow_mo", 0),
+                **ctx_args,
+            )
 
-                await context.route("**/*", route_handler)
+            if manual_cookies:
+                try:
+                    await context.add_cookies(manual_cookies)
+                    self.logger.info(
+                        "whitehills: added %s cookies to context", len(manual_cookies)
+                    )
+                except Exception as exc:
+                    self.logger.info("whitehills: failed to add cookies: %s", exc)
 
-                page = await context.new_page()
-                network_prices: list[Decimal] = []
+            # Stylesheets stay: the DOM probe relies on computed visibility.
+            await block_heavy_requests(context)
 
-                async def on_response(resp: Response):
-                    try:
-                        if resp.request.resource_type not in {"xhr", "fetch"}:
-                            return
-                        if "whitehills.ru" not in resp.url:
-                            return
-                        text = await resp.text()
-                        price_candidate = _extract_price_from_text(text)
-                        if price_candidate is not None:
-                            network_prices.append(price_candidate)
-                    except Exception:
-                        pass
+            page = await context.new_page()
+            network_prices: list[Decimal] = []
+            network_xhr_prices: list[tuple[str, Decimal]] = []
+            network_price_found = asyncio.Event()
 
-                page.on("response", on_response)
+            async def on_response(resp: Response):
+                if network_price_found.is_set():
+                    return
+                try:
+                    if resp.request.resource_type not in {"xhr", "fetch"}:
+                        return
+                    if "whitehills.ru" not in resp.url:
+                        return
+                    price_candidate = _extract_price_from_text(await resp.body())
+                    if price_candidate is not None and not network_price_found.is_set():
+                        network_prices.append(price_candidate)
+                        if resp.request.method == "GET":
+                            network_xhr_prices.append((resp.url, price_candidate))
+                        network_price_found.set()
+                except Exception:
+                    pass
 
-                await page.goto("https://whitehills.ru/", wait_until="domcontentloaded", timeout=30000)
-                await _human_pause(page)
-                await _dismiss_overlays(page)
-                await _human_pause(page)
+            page.on("response", on_response)
 
-                await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            # The home-page visit only exists to pick up session cookies; a
+            # context seeded from storage_state already has them.
+            if not manual_cookies:
+                await page.goto(BASE_URL, wait_until="domcontentloaded", timeout=30000)
                 await _human_pause(page)
                 await _dismiss_overlays(page)
                 await _human_pause(page)
 
-                page_content = ""
+            await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            await _wait_for_price_or_network(page, network_price_found, timeout_ms=8000)
+
+            # Banners do not hide price nodes from the DOM probe, so they are
+            # dismissed alongside it rather than ahead of it; the task keeps
+            # clicking until the page is released below.
+            if not network_price_found.is_set():
+                overlay_task = asyncio.create_task(_dismiss_overlays(page))
+            dom_price = price = await _price_from_dom_unless_network(page, network_price_found, self.logger)
+            if price is not None:
+                self.logger.info("whitehills: price via DOM = %s", price)
+                result_snapshot = ProductSnapshot(
+                    url=url,
+                    price=price,
+                    currency="RUB",
+                    title=None,
+                    variant_key=variant,
+                    payload=None,
+                )
+            elif network_prices:
+                price = network_prices[0]
+                if price is not None:
+                    self.logger.info("whitehills: price via network = %s", price)
+                    result_snapshot = ProductSnapshot(
+                        url=url,
+                        price=price,
+                        currency="RUB",
+                        title=None,
+                        variant_key=variant,
+                        payload=None,
+                    )
+            # Only the ld+json texts and a captcha flag come back for a miss;
+            # the serialised DOM is fetched solely for an enabled debug dump.
+            if result_snapshot is None:
                 try:
-                    page_content = await page.content()
+                    probe = await page.evaluate(PAGE_MISS_PROBE_SCRIPT)
                 except Exception:
-                    page_content = ""
-                if page_content and _captcha_detected(page_content):
+                    probe = {}
+                if probe.get("captcha"):
                     self.logger.warning("whitehills: captcha detected (playwright)")
-
-                price = await _price_from_dom(page, self.logger)
-                if price is not None:
-                    self.logger.info("whitehills: price via DOM = %s", price)
+                json_price = _jsonld_offers_price(_decode_jsonld_texts(probe.get("jsonld") or []))
+                if json_price is not None:
+                    price = json_price
+                    self.logger.info("whitehills: price via JSON-LD = %s", price)
                     result_snapshot = ProductSnapshot(
                         url=url,
                         price=price,
@@ -564,73 +1122,56 @@ class WhiteHillsParser(BaseParser):
                         variant_key=variant,
                         payload=None,
                     )
-                elif network_prices:
-                    price = network_prices[-1]
-                    if price is not None:
-                        self.logger.info("whitehills: price via network = %s", price)
-                        result_snapshot = ProductSnapshot(
-                            url=url,
-                            price=price,
-                            currency="RUB",
-                            title=None,
-                            variant_key=variant,
-                            payload=None,
-                        )
-                if result_snapshot is None:
-                    try:
-                        json_texts = await page.evaluate(
-                            """
-                            () => Array.from(document.querySelectorAll('script[type="application/ld+json"]'))
-                                  .map(s => s.textContent || '')
-                            """
-                        )
-                    except Exception:
-                        json_texts = []
-
-                    json_price = _price_from_jsonld(json_texts, self.logger)
-                    if json_price is None and page_content:
-                        json_price = _price_from_jsonld(page_content, self.logger)
-                    if json_price is not None:
-                        price = json_price
-                        self.logger.info("whitehills: price via JSON-LD = %s", price)
-                        result_snapshot = ProductSnapshot(
-                            url=url,
-                            price=price,
-                            currency="RUB",
-                            title=None,
-                            variant_key=variant,
-                            payload=None,
-                        )
-
-                if result_snapshot is None and page is not None:
-                    await _dump_debug(page, self.logger)
-                    debug_dump_saved = True
+
+            # An XHR is only replayed on later runs once the rendered page
+            # confirmed its price; a cart or recommendations call that happens
+            # to carry a "price" key must not become the product's source.
+            if result_snapshot is not None and network_xhr_prices:
+                page_price = dom_price if dom_price is not None else await _page_price(page, self.logger)
+                for xhr_url, xhr_price in network_xhr_prices:
+                    if xhr_price == page_price:
+                        _XHR_PRICE_URLS.put(url, xhr_url)
+                        break
+
+            if result_snapshot is None and page is not None and dump_pending:
+                await _dump_debug(page, self.logger)
+                dump_pending = False
         except Exception as exc:  # pragma: no cover - optional dependency or runtime issues
             self.logger.info("whitehills: playwright error: %s", exc)
-            if page is not None and not debug_dump_saved:
+            if page is not None and dump_pending:
                 await _dump_debug(page, self.logger)
-                debug_dump_saved = True
+                dump_pending = False
         finally:
+            if overlay_task is not None:
+                overlay_task.cancel()
+                await asyncio.gather(overlay_task, return_exceptions=True)
             try:
                 if context is not None:
-                    await context.close()
-            except Exception:
-                pass
-            try:
-                if browser is not None:
-                    await browser.close()
+                    await _BROWSER_POOL.release_context(context)
             except Exception:
                 pass
 
         if result_snapshot is not None:
             return result_snapshot
 
+        for static_page in static_pages:
+            price = self._price_from_page(static_page, url=url)
+            if price is not None:
+                self.logger.info("whitehills: price via static fallback = %s", price)
+                return ProductSnapshot(
+                    url=url,
+                    price=price,
+                    currency="RUB",
+                    title=None,
+                    variant_key=variant,
+                    payload=None,
+                )
+
         self.logger.warning("whitehills: price not found")
         raise ScraperError("Price not found on WhiteHills product page")
 
     def parse_price(self, html: str, url: str | None = None) -> Decimal:
-        soup = BeautifulSoup(html, "lxml")
-        price = self._parse_price_from_soup(soup, url=url)
+        price = self._price_from_page(_StaticPage(html), url=url)
         if price is None:
             self.logger.warning("WhiteHills price not found", extra={"url": url})
             raise PriceNotFoundError("Price not found on WhiteHills product page")
@@ -638,58 +1179,65 @@ class WhiteHillsParser(BaseParser):
 
     async def fetch_category(self, url: str) -> list[ProductSnapshot]:
         html = await self.fetch_html(url)
-        soup = BeautifulSoup(html, "lxml")
+        doc = parse_html(html)
+        if doc is None:
+            self.logger.debug("WhiteHills category page is empty", extra={"url": url})
+            return []
+        cards: list[tuple[etree._Element, str]] = []
+        for card in CATEGORY_CARD_XPATH(doc):
+            links = CATEGORY_LINK_XPATH(card)
+            if links:
+                cards.append((links[0], CATEGORY_PRICE_TEXT_XPATH(card)))
+
         items: list[ProductSnapshot] = []
-        for card in soup.select(".collection__item, .products-list__item"):
-            link = card.select_one("a")
-            price_node = card.select_one(".price, .product__price")
-            if not link or not price_node:
-                continue
-            href = link.get("href") or ""
-            try:
-                price_value = self.normalize_price(price_node.get_text())
-            except ValueError:
-                self.logger.debug("WhiteHills category price parse failed", extra={"url": url})
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        prices = self.normalize_prices(price_text for _, price_text in cards)
+        for (link, _), price_value in zip(cards, prices):
+            if price_value is None:
+                if debug:
+                    self.logger.debug("WhiteHills category price parse failed", extra={"url": url})
                 continue
-            title = link.get_text(strip=True)
             items.append(
                 ProductSnapshot(
-                    url=href if href.startswith("http") else f"https://whitehills.ru{href}",
+                    url=urljoin(BASE_URL, link.get("href") or ""),
                     price=price_value,
                     currency="RUB",
-                    title=title,
+                    title=node_text(link, ""),
                 )
             )
         return items
 
-    def _parse_price_from_soup(
-        self,
-        soup: BeautifulSoup,
-        *,
-        url: str | None = None,
-        jsonld_product: Optional[dict[str, Any]] = None,
+    def _price_from_page(
+        self, page: _StaticPage, url: str | None = None, *, confident_only: bool = False
     ) -> Decimal | None:
-        product = jsonld_product or self._find_jsonld_product(soup)
+        # JSON-LD usually carries the price and is read straight from the raw
+        # HTML; the tree is built for the DOM fallbacks only.
+        product = self._find_jsonld_product(page.jsonld_blocks)
         if product:
             price = self._price_from_jsonld_product(product)
             if price is not None:
                 self.logger.info("whitehills: price via jsonld = %s", price, extra={"url": url})
                 return price
-        price = self._price_from_static_dom(soup, url=url)
-        return price
-
-    def _find_jsonld_product(self, soup: BeautifulSoup) -> Optional[dict[str, Any]]:
-        for script in soup.find_all("script", attrs={"type": "application/ld+json"}):
-            text = script.string or script.text or ""
-            if not text.strip():
-                continue
-            try:
-                data = json.loads(text)
-            except json.JSONDecodeError:
-                continue
-            for candidate in self._iter_dicts(data):
-                if self._is_product_type(candidate.get("@type")):
+        return self._price_from_static_dom(page.tree, url=url, confident_only=confident_only)
+
+    def _find_jsonld_product(self, blocks: Iterable[Any]) -> Optional[dict[str, Any]]:
+        for data in blocks:
+            # Product almost always sits at the top level; only walk the whole
+            # tree (e.g. an @graph of WebPage/Breadcrumb nodes) when it does not.
+            top_level = data if isinstance(data, list) else [data]
+            for candidate in top_level:
+                if isinstance(candidate, dict) and self._is_product_type(candidate.get("@type")):
                     return candidate
+            # Explicit pre-order stack walk that returns on the first Product.
+            stack = [data]
+            while stack:
+                node = stack.pop()
+                if isinstance(node, dict):
+                    if self._is_product_type(node.get("@type")):
+                        return node
+                    stack.extend(reversed(node.values()))
+                elif isinstance(node, list):
+                    stack.extend(reversed(node))
         return None
 
     def _price_from_jsonld_product(self, product: dict[str, Any]) -> Decimal | None:
@@ -703,6 +1251,13 @@ class WhiteHillsParser(BaseParser):
             offer = None
         if not offer:
             return None
+        # WhiteHills' own shape is offers.price as a plain number or numeric
+        # string; take it as is and keep the normalising key scan for the rest.
+        raw_price = offer.get("price")
+        if type(raw_price) is int:
+            return Decimal(raw_price)
+        if isinstance(raw_price, str) and PLAIN_NUMBER_PATTERN.fullmatch(raw_price):
+            return Decimal(raw_price)
         for key in ("price", "priceValue", "lowPrice", "highPrice", "currentPrice", "value", "amount"):
             if key in offer and offer[key] is not None:
                 try:
@@ -711,33 +1266,61 @@ class WhiteHillsParser(BaseParser):
                     continue
         return None
 
-    def _price_from_static_dom(self, soup: BeautifulSoup, url: str | None = None) -> Decimal | None:
-        first_pass_selectors = ("span.price_value", ".values_wrapper .price_value")
-        for selector in first_pass_selectors:
-            element = soup.select_one(selector)
-            if element and element.get_text(strip=True):
-                text = element.get_text(" ", strip=True)
+    def _price_from_static_dom(
+        self, doc: etree._Element | None, url: str | None = None, *, confident_only: bool = False
+    ) -> Decimal | None:
+        if doc is None:
+            return None
+        for xpath in (SPAN_PRICE_VALUE_XPATH, WRAPPED_PRICE_VALUE_XPATH):
+            elements = xpath(doc)
+            if not elements:
+                continue
+            text = node_text(elements[0])
+            if not text:
+                continue
+            try:
+                price = self._to_decimal(text)
+            except Exception:
+                continue
+            self.logger.info("whitehills: price via dom = %s", price, extra={"url": url})
+            return price
+
+        if confident_only:
+            # The broad price-class and script scans below accept any stray
+            # number (a "Прайс-лист 2024" menu link), so they are not used here.
+            for content in META_PRICE_CONTENT_XPATH(doc):
                 try:
-                    price = self._to_decimal(text)
+                    price = self._to_decimal(content)
                 except Exception:
                     continue
                 self.logger.info("whitehills: price via dom = %s", price, extra={"url": url})
                 return price
+            return None
 
-        meta = soup.select_one("meta[itemprop='price']")
-        if meta and meta.get("content"):
+        meta = offers_price = classed = None
+        for element in PRICE_CANDIDATES_XPATH(doc):
+            is_price_prop = element.get("itemprop") == "price"
+            if meta is None and is_price_prop and element.tag == "meta":
+                meta = element
+            if offers_price is None and is_price_prop and any(
+                parent.get("itemprop") == "offers" for parent in element.iterancestors()
+            ):
+                offers_price = element
+            if classed is None and "price" in (element.get("class") or ""):
+                classed = element
+
+        if meta is not None and meta.get("content"):
             try:
-                price = self._to_decimal(meta["content"])
+                price = self._to_decimal(meta.get("content"))
                 self.logger.info("whitehills: price via dom = %s", price, extra={"url": url})
                 return price
             except Exception:
                 pass
 
-        for selector in ("[itemprop='offers'] [itemprop='price']", "[class*='price']"):
-            element = soup.select_one(selector)
-            if not element:
+        for element in (offers_price, classed):
+            if element is None:
                 continue
-            text = element.get_text(" ", strip=True)
+            text = node_text(element)
             if not text:
                 continue
             try:
@@ -747,11 +1330,11 @@ class WhiteHillsParser(BaseParser):
             self.logger.info("whitehills: price via dom = %s", price, extra={"url": url})
             return price
 
-        for script in soup.find_all("script"):
-            text = script.string or script.text or ""
+        for script in SCRIPT_PROBE_XPATH(doc):
+            text = script.text
             if not text:
                 continue
-            match = re.search(r"\"(?:price|currentPrice|amount|value|priceValue)\"\s*:\s*\"?(\d+(?:[.,]\d{1,2})?)\"?", text)
+            match = SCRIPT_PRICE_PATTERN.search(text)
             if not match:
                 continue
             try:
@@ -762,20 +1345,11 @@ class WhiteHillsParser(BaseParser):
             return price
         return None
 
-    def _iter_dicts(self, data: Any) -> Iterable[dict[str, Any]]:
-        if isinstance(data, dict):
-            yield data
-            for value in data.values():
-                yield from self._iter_dicts(value)
-        elif isinstance(data, list):
-            for item in data:
-                yield from self._iter_dicts(item)
-
     def _is_product_type(self, value: Any) -> bool:
         if isinstance(value, str):
-            return value.lower() == "product"
-        if isinstance(value, Iterable):
-            return any(isinstance(item, str) and item.lower() == "product" for item in value)
+            return value.lower() in PRODUCT_TYPES
+        if isinstance(value, (list, tuple)):
+            return any(isinstance(item, str) and item.lower() in PRODUCT_TYPES for item in value)
         return False
 
 
@@ -1,5 +1,7 @@
 from decimal import Decimal
 
+import pytest
+
 from scraper.parsers.petrovich import PetrovichParser
 from scraper.parsers.whitehills import WhiteHillsParser
 
@@ -30,3 +32,53 @@ def test_whitehills_span_price_value():
 def test_petrovich_data_test_price():
     html = '<p data-test="product-retail-price">149<span>\u2009</span><span>₽</span></p>'
     assert PetrovichParser().parse_price(html) == Decimal("149")
+
+
+def test_petrovich_price_jsonld():
+    html = (
+        '<script type="application/ld+json">'
+        '{"@type":"Product","name":"Brick","offers":{"price":"89.90"}}'
+        "</script><p data-test='product-retail-price'>120 ₽</p>"
+    )
+    assert PetrovichParser().parse_price(html) == Decimal("89.90")
+
+
+def test_petrovich_price_jsonld_graph():
+    html = (
+        '<script type="application/ld+json">'
+        '{"@graph":[{"@type":"BreadcrumbList"},{"@type":"Product","offers":{"price":"312"}}]}'
+        "</script>"
+    )
+    assert PetrovichParser().parse_price(html) == Decimal("312")
+
+
+def test_petrovich_inline_script_after_priceless_next_data(monkeypatch):
+    from scraper.parsers import petrovich
+
+    html = (
+        '<script id="__NEXT_DATA__" type="application/json">{"props": {"pageProps": {}}}</script>'
+        '<script>{"price": {"current": 455}}</script>'
+    )
+    decoded = []
+    real_loads = petrovich.orjson.loads
+    monkeypatch.setattr(petrovich.orjson, "loads", lambda text: decoded.append(text) or real_loads(text))
+    assert PetrovichParser().parse_price(html) == Decimal("455")
+    # __NEXT_DATA__ is decoded once, by the next-data extractor only.
+    assert sum("pageProps" in text for text in decoded) == 1
+
+
+def test_base_to_decimal_keeps_numeric_precision_across_calls():
+    from scraper.parsers.base import to_decimal
+
+    assert to_decimal("1 990") == Decimal("1990")
+    assert str(to_decimal(1)) == "1"
+    assert str(to_decimal(1.0)) == "1.0"
+    assert str(to_decimal("1")) == "1"
+
+
+def test_normalize_price_rejects_booleans():
+    parser = PetrovichParser()
+    assert parser.normalize_price(7) == Decimal("7.00")
+    with pytest.raises(ValueError):
+        parser.normalize_price(True)
+    assert parser.normalize_prices([True, "1 990 ₽"]) == [None, Decimal("1990.00")]
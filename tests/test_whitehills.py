@@ -1,5 +1,7 @@
 from decimal import Decimal
 
+import pytest
+
 from scraper.parsers.whitehills import WhiteHillsParser
 
 
@@ -11,3 +13,164 @@ def test_jsonld_price():
 def test_dom_price_value():
     html = '<span class="values_wrapper"><span class="price_value">2\u00A0200</span></span>'
     assert WhiteHillsParser().parse_price(html) == Decimal("2200")
+
+
+def test_jsonld_qualified_product_type():
+    html = (
+        '<script type="application/ld+json">'
+        '{"@type":["https://schema.org/Product"],"offers":{"price":"990"}}'
+        "</script>"
+    )
+    assert WhiteHillsParser().parse_price(html) == Decimal("990")
+
+
+def test_jsonld_skips_broken_block():
+    html = (
+        '<script type="application/ld+json">{broken</script>'
+        '<script type="application/ld+json">{"@type":"Product","offers":{"price":"450"}}</script>'
+    )
+    assert WhiteHillsParser().parse_price(html) == Decimal("450")
+
+
+def test_jsonld_product_inside_graph():
+    html = (
+        '<script type="application/ld+json">'
+        '{"@graph":[{"@type":"WebPage"},{"@type":"Product","offers":[{"price":"1 250"}]}]}'
+        "</script>"
+    )
+    assert WhiteHillsParser().parse_price(html) == Decimal("1250")
+
+
+def test_dom_meta_price_wins_over_earlier_price_class():
+    html = (
+        '<div class="old-price">9 999 ₽</div>'
+        '<div itemprop="offers"><meta itemprop="price" content="1490"></div>'
+    )
+    assert WhiteHillsParser().parse_price(html) == Decimal("1490")
+
+
+@pytest.mark.asyncio
+async def test_whitehills_price_wait_resolves_on_price_nodes_not_jsonld():
+    import asyncio
+
+    from lxml import etree, html as lxml_html
+
+    from scraper.parsers.base import class_xpath
+    from scraper.parsers.whitehills import _wait_for_price_or_network
+
+    # The CSS selectors the page may be asked to wait for, as XPaths.
+    selector_xpaths = {
+        ".price_value": f"//*[{class_xpath('price_value')}]",
+        "[itemprop='price']": "//*[@itemprop='price']",
+        "script[type='application/ld+json']": "//script[@type='application/ld+json']",
+    }
+
+    class FakePage:
+        def __init__(self):
+            self.body = '<script type="application/ld+json">{"@type": "BreadcrumbList"}</script>'
+
+        async def wait_for_selector(self, selector, timeout=None):
+            xpaths = [etree.XPath(selector_xpaths[part.strip()]) for part in selector.split(",")]
+            while True:
+                doc = lxml_html.fromstring(f"<html><body>{self.body}</body></html>")
+                if any(xpath(doc) for xpath in xpaths):
+                    return
+                await asyncio.sleep(0.005)
+
+    page = FakePage()
+    wait = asyncio.create_task(_wait_for_price_or_network(page, asyncio.Event(), timeout_ms=8000))
+    await asyncio.sleep(0.05)
+    # The ld+json block is in the page from the start; it must not release the wait.
+    assert not wait.done()
+
+    page.body += '<b class="price_value">1 990 ₽</b>'
+    await asyncio.wait_for(wait, 1)
+
+    # A network price releases the wait without any price node.
+    network_price_found = asyncio.Event()
+    wait = asyncio.create_task(_wait_for_price_or_network(FakePage(), network_price_found, timeout_ms=8000))
+    await asyncio.sleep(0.02)
+    assert not wait.done()
+    network_price_found.set()
+    await asyncio.wait_for(wait, 1)
+
+
+def test_whitehills_ajax_candidates_probed_concurrently(monkeypatch):
+    import threading
+    import time
+
+    from scraper.parsers import whitehills
+
+    barrier = threading.Barrier(3, timeout=5)
+    sessions = []
+
+    class FakeResponse:
+        status_code = 200
+
+        def __init__(self, content):
+            self.content = content
+
+    class FakeScraper:
+        def __init__(self):
+            self.threads = set()
+
+        def get(self, url, headers=None, timeout=None):
+            self.threads.add(threading.get_ident())
+            barrier.wait()
+            if url.endswith("/first"):
+                # The earliest candidate answers last but still wins.
+                time.sleep(0.05)
+                return FakeResponse(b'{"price": "1 290"}')
+            if url.endswith("/second"):
+                return FakeResponse(b'{"price": "990"}')
+            return FakeResponse(b"{}")
+
+    def clone(scraper):
+        sessions.append(FakeScraper())
+        return sessions[-1]
+
+    monkeypatch.setattr(whitehills, "_clone_scraper", clone)
+    urls = ["https://whitehills.ru/ajax/first", "https://whitehills.ru/ajax/second", "https://whitehills.ru/ajax/c"]
+    assert whitehills._price_via_ajax_candidates(urls, {}, FakeScraper()) == Decimal("1290")
+    # One session per worker thread, never shared between threads.
+    assert len(sessions) == 3
+    assert all(len(session.threads) == 1 for session in sessions)
+
+
+def test_whitehills_storage_state_reread_only_when_changed(tmp_path):
+    import os
+
+    from scraper.parsers.whitehills import _load_storage_state
+
+    path = tmp_path / "state.json"
+    path.write_text('{"cookies": [{"name": "sid", "value": "1", "domain": "whitehills.ru", "path": "/"}]}')
+    os.utime(path, ns=(1, 1))
+    headers, cookies = _load_storage_state(str(path))
+    assert headers["Cookie"] == "sid=1"
+    assert cookies == [{"name": "sid", "value": "1", "domain": ".whitehills.ru", "path": "/"}]
+    assert _load_storage_state(str(path))[1] is cookies
+
+    path.write_text('{"cookies": [{"name": "sid", "value": "2", "domain": ".whitehills.ru", "path": "/"}]}')
+    os.utime(path, ns=(2, 2))
+    assert _load_storage_state(str(path))[0]["Cookie"] == "sid=2"
+    assert _load_storage_state(str(tmp_path / "missing.json"))[1] == []
+
+
+def test_whitehills_expiring_lru_bounds_and_expires(monkeypatch):
+    from scraper.parsers import whitehills
+
+    now = [1000.0]
+    monkeypatch.setattr(whitehills.time, "monotonic", lambda: now[0])
+    cache = whitehills._ExpiringLRU(max_entries=2, max_age=60)
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    # Reading "a" makes "b" the least recently used entry.
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    now[0] += 61
+    assert cache.get("a") is None
+
@@ -1,7 +1,46 @@
 from decimal import Decimal
 
-from scraper.parsers.whitehills import to_decimal
+from scraper.parsers.whitehills import _extract_price_from_text, to_decimal
 
 
 def test_whitehills_spaces():
     assert to_decimal("2\u00A0\u202F200 ₽") == Decimal("2200")
+
+
+def test_whitehills_xhr_price_key_is_case_insensitive():
+    body = '{"data": {"item": {"id": 7, "CurrentPrice": "3 490"}}}'
+    assert _extract_price_from_text(body) == Decimal("3490")
+
+
+def test_whitehills_text_fallback_prefers_price_value_class():
+    body = '<b>доставка 300 ₽</b><span class="price_value">2 490</span>'
+    assert _extract_price_from_text(body) == Decimal("2490")
+
+
+def test_whitehills_text_fallback_same_for_str_and_bytes():
+    bodies = [
+        '<span class="price_value">2\u00a0490 ₽</span>',
+        '<span class="price_value">' + "1" * 45 + "</span><b>990 ₽</b>",
+        "<b>Итого 12\u202f345 руб.</b>",
+        "<p>нет цены</p>",
+    ]
+    for body in bodies:
+        assert _extract_price_from_text(body) == _extract_price_from_text(body.encode())
+    assert _extract_price_from_text("<b>Итого 1 990 руб.</b>") == Decimal("1990")
+
+
+def test_whitehills_xhr_walk_prefers_product_subtree():
+    body = b'{"product": {"price": 2590}, "related": [{"price": 990}]}'
+    assert _extract_price_from_text(body) == Decimal("2590")
+
+
+def test_whitehills_text_fallback_scans_raw_bytes():
+    assert _extract_price_from_text("<b>Итого 12 345 РУБ</b>".encode()) == Decimal("12345")
+    body = '<b>доставка 300 ₽</b><span class="price_value">2 490</span>'.encode()
+    assert _extract_price_from_text(body) == Decimal("2490")
+
+
+def test_whitehills_xhr_price_skips_zero_totals():
+    assert _extract_price_from_text('{"cart": {"totalPrice": 0}}') is None
+    body = '{"totalPrice": 0, "offers": {"price": "990"}}'
+    assert _extract_price_from_text(body) == Decimal("990")
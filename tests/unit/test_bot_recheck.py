@@ -32,6 +32,14 @@ class DummySession:
         self.flushed = True
 
 
+class DummyScraper:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
 def _patch_session(monkeypatch: pytest.MonkeyPatch, session: DummySession) -> None:
     @contextmanager
     def fake_scope():
@@ -45,10 +53,12 @@ async def test_perform_recheck_reports_scraper_error(monkeypatch: pytest.MonkeyP
     query = DummyQuery()
     session = DummySession(SimpleNamespace())
     _patch_session(monkeypatch, session)
+    scraper = DummyScraper()
 
     class FailingService:
         def __init__(self, _session):
             assert _session is session
+            self.scraper = scraper
 
         async def check_product(self, product):
             raise ScraperError("network timeout")
@@ -59,6 +69,7 @@ async def test_perform_recheck_reports_scraper_error(monkeypatch: pytest.MonkeyP
 
     assert query.messages == ["Не удалось проверить товар: network timeout"]
     assert session.flushed is False
+    assert scraper.closed is True
 
 
 @pytest.mark.asyncio
@@ -66,10 +77,12 @@ async def test_perform_recheck_reports_msklad_error(monkeypatch: pytest.MonkeyPa
     query = DummyQuery()
     session = DummySession(SimpleNamespace())
     _patch_session(monkeypatch, session)
+    scraper = DummyScraper()
 
     class FailingService:
         def __init__(self, _session):
             assert _session is session
+            self.scraper = scraper
 
         async def check_product(self, product):
             raise MoySkladError("api unavailable")
@@ -80,4 +93,5 @@ async def test_perform_recheck_reports_msklad_error(monkeypatch: pytest.MonkeyPa
 
     assert query.messages == ["Не удалось обновить цену в МойСклад: api unavailable"]
     assert session.flushed is False
+    assert scraper.closed is True
 
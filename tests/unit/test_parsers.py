@@ -1,3 +1,6 @@
+from decimal import Decimal
+from functools import partial
+
 import pytest
 
 from scraper.parsers.petrovich import PetrovichParser
@@ -5,6 +8,31 @@ from scraper.parsers.whitehills import WhiteHillsParser
 from scraper.parsers.mk4s import MK4SParser
 
 
+class FakeHttpResponse:
+    """Minimal requests.Response stand-in for the WhiteHills static fetch paths."""
+
+    def __init__(self, text: str = "", status_code: int = 200, headers: dict | None = None):
+        self.status_code = status_code
+        self.text = text
+        self.encoding = "utf-8"
+        self.content = text.encode()
+        self.headers = headers or {}
+
+
+def static_scraper(html: str):
+    """A cloudscraper stand-in class whose every GET returns ``html``."""
+
+    class FakeScraper:
+        instances: list = []
+
+        def __init__(self):
+            FakeScraper.instances.append(self)
+
+        def get(self, url, headers=None, timeout=None):
+            return FakeHttpResponse(html)
+
+    return FakeScraper
+
 @pytest.mark.asyncio
 async def test_petrovich_parser_extracts_price(monkeypatch):
     parser = PetrovichParser()
@@ -61,6 +89,25 @@ async def test_mk4s_parser_variants(monkeypatch):
     assert result.sku == "BLU"
 
 
+@pytest.mark.asyncio
+async def test_mk4s_parser_keeps_decimal_precision(monkeypatch):
+    parser = MK4SParser()
+    html = """
+    <html><body>
+      <script type="application/json">
+        {"product": {"name": "Precise", "price": "1234.57"}}
+      </script>
+    </body></html>
+    """
+
+    async def fake_fetch(url):
+        return html
+
+    monkeypatch.setattr(parser, "fetch_html", fake_fetch)
+    result = await parser.fetch_product("https://mk4s.ru/p/sku-2")
+    assert result.price == Decimal("1234.57")
+
+
 @pytest.mark.asyncio
 async def test_mk4s_parser_handles_json_assignment(monkeypatch):
     parser = MK4SParser()
@@ -111,3 +158,552 @@ async def test_mk4s_parser_fallbacks_to_dom(monkeypatch):
     assert result.price == 1999.0
     assert result.variant_key == "0.50 мм|Серый"
     assert result.payload == {"variant": {"Толщина": "0.50 мм", "Цвет": "Серый"}}
+
+
+@pytest.mark.asyncio
+async def test_whitehills_category_cards(monkeypatch):
+    parser = WhiteHillsParser()
+    html = """
+    <html><body>
+      <div class="collection__item">
+        <a href="/catalog/item-1"> Item One </a>
+        <div class="product__price">1 490 ₽</div>
+      </div>
+      <div class="products-list__item">
+        <a href="https://whitehills.ru/catalog/item-2">Item Two</a>
+        <span class="price">2 990 ₽</span>
+      </div>
+      <div class="collection__item-wrapper">
+        <a href="/catalog/ignored">Ignored</a>
+        <span class="price">10 ₽</span>
+      </div>
+      <div class="collection__item"><a href="/catalog/no-price">No price</a></div>
+    </body></html>
+    """
+
+    async def fake_fetch(url):
+        return html
+
+    monkeypatch.setattr(parser, "fetch_html", fake_fetch)
+    result = await parser.fetch_category("https://whitehills.ru/catalog/")
+
+    assert [item.url for item in result] == [
+        "https://whitehills.ru/catalog/item-1",
+        "https://whitehills.ru/catalog/item-2",
+    ]
+    assert [item.title for item in result] == ["Item One", "Item Two"]
+    assert [item.price for item in result] == [1490, 2990]
+
+
+@pytest.mark.asyncio
+async def test_whitehills_static_html_skips_playwright(monkeypatch):
+    from scraper.parsers import whitehills
+
+    html = '<html><body><div class="values_wrapper"><b class="price_value">3 100 ₽</b></div></body></html>'
+
+    FakeScraper = static_scraper(html)
+
+    async def fail_browser(**kwargs):
+        raise AssertionError("Playwright must not be used")
+
+    monkeypatch.setattr(whitehills, "_create_scraper", FakeScraper)
+    monkeypatch.setattr(whitehills._BROWSER_POOL, "browser", fail_browser)
+    parser = WhiteHillsParser()
+    result = await parser.fetch_product("https://whitehills.ru/p/sku-2")
+    assert result.price == 3100
+    await parser.fetch_product("https://whitehills.ru/p/sku-3")
+    assert len(FakeScraper.instances) == 1
+
+
+@pytest.mark.asyncio
+async def test_whitehills_heuristic_static_price_waits_for_playwright(monkeypatch):
+    from scraper.parsers import whitehills
+
+    html = '<html><body><a class="menu-price-list">Прайс-лист 2024</a></body></html>'
+
+    FakeScraper = static_scraper(html)
+
+    attempts = []
+
+    async def failing_browser(**kwargs):
+        attempts.append(kwargs)
+        raise RuntimeError("no browser")
+
+    monkeypatch.setattr(whitehills, "_create_scraper", FakeScraper)
+    monkeypatch.setattr(whitehills._BROWSER_POOL, "browser", failing_browser)
+    parser = WhiteHillsParser()
+    url = "https://whitehills.ru/p/sku-menu"
+    confident = partial(parser._price_from_page, url=url, confident_only=True)
+    assert whitehills._price_via_cloudscraper(url, parser.logger, {}, FakeScraper(), confident) == (None, True)
+
+    # The broad class scan only runs once the browser attempt came up empty.
+    result = await parser.fetch_product(url)
+    assert attempts
+    assert result.price == Decimal("2024")
+
+
+@pytest.mark.asyncio
+async def test_whitehills_static_jsonld_graph_skips_playwright(monkeypatch):
+    from scraper.parsers import whitehills
+
+    html = (
+        '<script type="application/ld+json">{"@graph": [{"@type": "WebPage"}, '
+        '{"@type": "Product", "offers": {"price": "1 750"}}]}</script>'
+    )
+
+    FakeScraper = static_scraper(html)
+
+    async def fail_browser(**kwargs):
+        raise AssertionError("Playwright must not be used")
+
+    def fail_parse(*args, **kwargs):
+        raise AssertionError("JSON-LD must price the page before the DOM fallback")
+
+    monkeypatch.setattr(whitehills, "_create_scraper", FakeScraper)
+    monkeypatch.setattr(whitehills._BROWSER_POOL, "browser", fail_browser)
+    parser = WhiteHillsParser()
+    monkeypatch.setattr(parser, "_price_from_page", fail_parse)
+    result = await parser.fetch_product("https://whitehills.ru/p/sku-graph")
+    assert result.price == Decimal("1750")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("batch_method", "parser_method"),
+    [("fetch_products_parallel", "fetch_product"), ("fetch_categories_parallel", "fetch_category")],
+)
+async def test_scraper_service_batches_bound_concurrency_and_keep_errors(batch_method, parser_method):
+    import asyncio
+
+    from scraper import ScraperService
+    from scraper.parsers.base import ProductSnapshot, ScraperError
+
+    parser = PetrovichParser()
+    active = 0
+    peak = 0
+
+    async def fake_fetch(url, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if url.endswith("bad"):
+            raise ScraperError("boom")
+        return ProductSnapshot(url=url, price=1, currency="RUB")
+
+    setattr(parser, parser_method, fake_fetch)
+    service = ScraperService(registry={"petrovich": lambda: parser})
+    batch = getattr(service, batch_method)
+    urls = [f"https://moscow.petrovich.ru/p/{index}" for index in range(5)] + ["https://moscow.petrovich.ru/p/bad"]
+    results = await batch("petrovich", urls, concurrency=2, return_exceptions=True)
+
+    assert peak == 2
+    assert [item.url for item in results[:5]] == urls[:5]
+    assert isinstance(results[5], ScraperError)
+    with pytest.raises(ScraperError):
+        await batch("petrovich", urls, concurrency=2)
+
+
+
+def test_antibot_delay_backs_off_on_rate_limit(monkeypatch):
+    from types import SimpleNamespace
+
+    from scraper.parsers.base import BaseParser, settings
+
+    monkeypatch.setattr(settings, "anti_bot_delay_seconds", 3)
+
+    def response(status, headers=None):
+        return SimpleNamespace(status_code=status, headers=headers or {})
+
+    assert BaseParser._antibot_delay(response(403), 3) == 3
+    assert [BaseParser._antibot_delay(response(429), attempt) for attempt in (1, 2, 3)] == [3, 6, 12]
+    assert BaseParser._antibot_delay(response(429, {"Retry-After": "20"}), 1) == 20
+    assert BaseParser._antibot_delay(response(429, {"Retry-After": "3600"}), 1) == 60
+
+
+def test_headers_cached_until_rotated(monkeypatch):
+    parser = PetrovichParser()
+    agents = iter(["ua-1", "ua-2"])
+    monkeypatch.setattr(parser, "_choose_user_agent", lambda: next(agents))
+
+    assert parser._build_headers()["User-Agent"] == "ua-1"
+    assert parser._build_headers()["User-Agent"] == "ua-1"
+    assert parser._build_headers(rotate=True)["User-Agent"] == "ua-2"
+
+
+@pytest.mark.asyncio
+async def test_petrovich_category_cards(monkeypatch):
+    parser = PetrovichParser()
+    html = """
+    <html><body>
+      <a class="catalogCard" href="/p/1"><span class="catalogCard-title">Brick</span>
+        <span class="catalogCard-price">1 200 ₽</span></a>
+      <a class="catalogCard" href="https://moscow.petrovich.ru/p/2">
+        <span class="catalogCard-price">99,50 ₽</span></a>
+      <a class="catalogCard" href="/p/3"><span class="catalogCard-title">No price</span></a>
+    </body></html>
+    """
+
+    async def fake_fetch(url):
+        return html
+
+    monkeypatch.setattr(parser, "fetch_html", fake_fetch)
+    result = await parser.fetch_category("https://moscow.petrovich.ru/catalog/1")
+    assert [(item.url, item.price, item.title) for item in result] == [
+        ("https://moscow.petrovich.ru/p/1", Decimal("1200"), "Brick"),
+        ("https://moscow.petrovich.ru/p/2", Decimal("99.50"), None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_whitehills_browser_pool_caps_open_contexts(monkeypatch):
+    import asyncio
+
+    from scraper.parsers import whitehills
+
+    class FakeContext:
+        browser = None
+
+        async def close(self):
+            pass
+
+    class FakeBrowser:
+        async def new_context(self, **kwargs):
+            return FakeContext()
+
+    async def fake_browser(**kwargs):
+        return FakeBrowser()
+
+    monkeypatch.setattr(whitehills, "PLAYWRIGHT_MAX_CONTEXTS", 2)
+    pool = whitehills._BrowserPool()
+    owner = object()
+    monkeypatch.setattr(pool, "browser", fake_browser)
+
+    first = await pool.acquire_context(owner, headless=True, slow_mo=0)
+    await pool.acquire_context(owner, headless=True, slow_mo=0)
+    waiting = asyncio.create_task(pool.acquire_context(owner, headless=True, slow_mo=0))
+    await asyncio.sleep(0.01)
+    assert not waiting.done()
+
+    await pool.release_context(first)
+    assert isinstance(await asyncio.wait_for(waiting, 1), FakeContext)
+
+
+@pytest.mark.asyncio
+async def test_whitehills_browser_pool_recycles_browser_after_max_uses(monkeypatch):
+    from scraper.parsers import whitehills
+
+    launched = []
+
+    class FakeContext:
+        def __init__(self, browser):
+            self.browser = browser
+
+        async def close(self):
+            self.browser.contexts.remove(self)
+
+    class FakeBrowser:
+        def __init__(self):
+            self.contexts = []
+            self.closed = False
+
+        def is_connected(self):
+            return not self.closed
+
+        async def new_context(self, **kwargs):
+            context = FakeContext(self)
+            self.contexts.append(context)
+            return context
+
+        async def close(self):
+            self.closed = True
+
+    class FakePlaywright:
+        class chromium:
+            @staticmethod
+            async def launch(**kwargs):
+                launched.append(FakeBrowser())
+                return launched[-1]
+
+    class FakeManager:
+        async def start(self):
+            return FakePlaywright()
+
+    monkeypatch.setattr(whitehills, "async_playwright", FakeManager)
+    monkeypatch.setattr(whitehills, "PLAYWRIGHT_BROWSER_MAX_USES", 2)
+    pool = whitehills._BrowserPool()
+    owner = object()
+
+    first = await pool.acquire_context(owner, headless=True, slow_mo=0)
+    await pool.release_context(await pool.acquire_context(owner, headless=True, slow_mo=0))
+    third = await pool.acquire_context(owner, headless=True, slow_mo=0)
+    assert len(launched) == 2 and third.browser is launched[1]
+    # The retired browser stays up until its last context is released.
+    assert not launched[0].closed
+    await pool.release_context(first)
+    assert launched[0].closed and not launched[1].closed
+
+
+@pytest.mark.asyncio
+async def test_whitehills_browser_pool_closes_after_last_owner(monkeypatch):
+    import asyncio
+
+    from scraper.parsers import whitehills
+
+    class FakeBrowser:
+        contexts: list = []
+        closed = False
+
+        def is_connected(self):
+            return not self.closed
+
+        async def new_context(self, **kwargs):
+            return object()
+
+        async def close(self):
+            self.closed = True
+
+    class FakePlaywright:
+        stopped = False
+
+        class chromium:
+            @staticmethod
+            async def launch(**kwargs):
+                return browser
+
+        async def stop(self):
+            self.stopped = True
+
+    class FakeManager:
+        async def start(self):
+            return playwright
+
+    browser, playwright = FakeBrowser(), FakePlaywright()
+    monkeypatch.setattr(whitehills, "async_playwright", FakeManager)
+    pool = whitehills._BrowserPool()
+    first, second = object(), object()
+    await pool.acquire_context(first, headless=True, slow_mo=0)
+    await pool.acquire_context(second, headless=True, slow_mo=0)
+
+    await pool.close(first)
+    assert not browser.closed
+    # Closing from a foreign event loop is an error, not a silent leak.
+    with pytest.raises(RuntimeError):
+        await asyncio.to_thread(asyncio.run, pool.close(second))
+    await pool.close(second)
+    assert browser.closed and playwright.stopped
+    # An owner that never opened a context is a no-op.
+    await pool.close(object())
+
+
+def test_response_text_defaults_to_utf8_without_charset():
+    import requests
+
+    from scraper.parsers.base import response_text
+
+    def make(content_type):
+        response = requests.Response()
+        response._content = "Цена 1 990 ₽".encode("utf-8")
+        response.headers["Content-Type"] = content_type
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+    # requests reports ISO-8859-1 for text/html without a charset parameter.
+    assert response_text(make("text/html")) == "Цена 1 990 ₽"
+    assert response_text(make("text/html; charset=utf-8")) == "Цена 1 990 ₽"
+    assert response_text(make("text/html; charset=windows-1251")) != "Цена 1 990 ₽"
+
+
+def test_blocked_route_pattern_matches_assets_and_trackers():
+    from scraper.parsers.base import BLOCKED_ROUTE_PATTERN, _HTML_FETCH_ROUTE_PATTERN
+
+    assert BLOCKED_ROUTE_PATTERN.search("https://whitehills.ru/upload/a.JPG?v=2")
+    assert BLOCKED_ROUTE_PATTERN.search("https://whitehills.ru/fonts/b.woff2")
+    assert BLOCKED_ROUTE_PATTERN.search("https://mc.yandex.ru/metrika/tag.js")
+    assert not BLOCKED_ROUTE_PATTERN.search("https://whitehills.ru/ajax/price")
+    assert not BLOCKED_ROUTE_PATTERN.search("https://whitehills.ru/catalog/pngs/item")
+    assert not BLOCKED_ROUTE_PATTERN.search("https://whitehills.ru/a.css")
+    assert _HTML_FETCH_ROUTE_PATTERN.search("https://whitehills.ru/a.css")
+
+
+@pytest.mark.asyncio
+async def test_whitehills_dom_probe_reads_candidates_in_one_evaluate():
+    import logging
+
+    from scraper.parsers.whitehills import PRICE_NODES_SCRIPT, _price_from_dom
+
+    class FakePage:
+        def __init__(self):
+            self.scripts = []
+
+        async def wait_for_selector(self, selector, **kwargs):
+            raise AssertionError("the caller already waited for the price nodes")
+
+        async def evaluate(self, script, arg=None):
+            self.scripts.append(script)
+            return {"texts": ["  ", "1 990 ₽"], "metaContents": ["2500"]}
+
+    page = FakePage()
+    price = await _price_from_dom(page, logging.getLogger("test"))
+    assert price == Decimal("1990")
+    assert page.scripts == [PRICE_NODES_SCRIPT]
+
+
+@pytest.mark.asyncio
+async def test_whitehills_dismiss_overlays_clicks_visible_buttons():
+    from scraper.parsers.whitehills import VISIBLE_OVERLAYS_SCRIPT, _dismiss_overlays
+
+    clicked = []
+
+    class FakeLocator:
+        def __init__(self, selector):
+            self.first = self
+            self.selector = selector
+
+        async def click(self, timeout=None):
+            clicked.append(self.selector)
+
+    class FakePage:
+        async def evaluate(self, script, arg=None):
+            assert script == VISIBLE_OVERLAYS_SCRIPT
+            return ["button.cookie-agree"]
+
+        def locator(self, selector):
+            return FakeLocator(selector)
+
+        async def wait_for_timeout(self, ms):
+            return None
+
+    await _dismiss_overlays(FakePage())
+    assert clicked == ["button.cookie-agree"]
+
+
+@pytest.mark.asyncio
+async def test_whitehills_httpx_fallback_when_cloudscraper_fails(monkeypatch):
+    import httpx
+
+    from scraper.parsers import whitehills
+
+    class FailingScraper:
+        def get(self, url, headers=None, timeout=None):
+            raise ConnectionError("challenge")
+
+    def handler(request):
+        return httpx.Response(200, text='<meta itemprop="price" content="4 200">')
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        whitehills.httpx, "AsyncClient", lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs)
+    )
+    monkeypatch.setattr(whitehills, "_create_scraper", FailingScraper)
+    result = await WhiteHillsParser().fetch_product("https://whitehills.ru/p/sku-4")
+    assert result.price == Decimal("4200")
+
+
+def test_whitehills_cloudscraper_reuses_price_on_not_modified():
+    import logging
+
+    from scraper.parsers import whitehills
+
+    url = "https://whitehills.ru/p/sku-etag"
+    sent = []
+
+    class FakeScraper:
+        def get(self, url, headers=None, timeout=None):
+            sent.append(dict(headers))
+            if headers.get("If-None-Match") == '"v1"':
+                return FakeHttpResponse(status_code=304)
+            return FakeHttpResponse('<meta itemprop="price" content="1500">', headers={"ETag": '"v1"'})
+
+    logger = logging.getLogger("test")
+    try:
+        assert whitehills._price_via_cloudscraper(url, logger, {}, FakeScraper()) == (Decimal("1500"), True)
+        assert whitehills._price_via_cloudscraper(url, logger, {}, FakeScraper()) == (Decimal("1500"), True)
+        assert sent[1]["If-None-Match"] == '"v1"'
+    finally:
+        whitehills._CONDITIONAL_PRICES.pop(url)
+
+
+def test_whitehills_conditional_validators_stay_on_page_request(monkeypatch):
+    import logging
+
+    from scraper.parsers import whitehills
+
+    url = "https://whitehills.ru/p/sku-ajax"
+    now = [1000.0]
+    sent = {}
+    monkeypatch.setattr(whitehills, "_CONDITIONAL_PRICES", whitehills._ExpiringLRU(8, max_age=60))
+    monkeypatch.setattr(whitehills.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(whitehills, "_clone_scraper", lambda scraper: scraper)
+
+    class FakeScraper:
+        def get(self, url, headers=None, timeout=None):
+            sent[url] = dict(headers)
+            if url.startswith("https://whitehills.ru/ajax/"):
+                return FakeHttpResponse("{}")
+            if headers.get("If-None-Match") == '"v1"':
+                return FakeHttpResponse(status_code=304)
+            return FakeHttpResponse('"https://whitehills.ru/ajax/a" "https://whitehills.ru/ajax/b"')
+
+    logger = logging.getLogger("test")
+    whitehills._remember_validators(url, {"ETag": '"v1"'}, Decimal("700"))
+    now[0] += 50
+    assert whitehills._price_via_cloudscraper(url, logger, {}, FakeScraper()) == (Decimal("700"), True)
+    # The 304 restarted the entry's max age.
+    now[0] += 50
+    assert whitehills._CONDITIONAL_PRICES.get(url) is not None
+
+    # A changed page is fetched in full; its ajax probes carry no validators.
+    whitehills._remember_validators(url, {"ETag": '"v2"'}, Decimal("700"))
+    assert whitehills._price_via_cloudscraper(url, logger, {}, FakeScraper()) == (None, True)
+    assert sent[url]["If-None-Match"] == '"v2"'
+    assert "If-None-Match" not in sent["https://whitehills.ru/ajax/a"]
+    assert "If-None-Match" not in sent["https://whitehills.ru/ajax/b"]
+
+
+def test_whitehills_cloudscraper_meta_price_skips_body_decode():
+    import logging
+
+    from scraper.parsers import whitehills
+
+    class BytesOnlyResponse:
+        status_code = 200
+        headers: dict = {}
+        content = '<meta itemprop="price" content="3 300"><p>Цена</p>'.encode()
+
+        @property
+        def text(self):
+            raise AssertionError("body must not be decoded")
+
+    class FakeScraper:
+        def get(self, url, headers=None, timeout=None):
+            return BytesOnlyResponse()
+
+    price, fetched = whitehills._price_via_cloudscraper(
+        "https://whitehills.ru/p/sku-bytes", logging.getLogger("test"), {}, FakeScraper()
+    )
+    assert (price, fetched) == (Decimal("3300"), True)
+
+
+@pytest.mark.asyncio
+async def test_mk4s_category_cards(monkeypatch):
+    parser = MK4SParser()
+    html = """
+    <html><body>
+      <div data-product='{"price": "1500.50"}'><a href="/p/1"> Sheet </a></div>
+      <div data-product="1"><a href="https://mk4s.ru/p/2">Profile</a>
+        <span class="product-card__price">2 300 ₽</span></div>
+      <div data-product="3"><a href="/p/3">No price</a></div>
+    </body></html>
+    """
+
+    async def fake_fetch(url):
+        return html
+
+    monkeypatch.setattr(parser, "fetch_html", fake_fetch)
+    result = await parser.fetch_category("https://mk4s.ru/catalog/")
+    assert [(item.url, item.price, item.title) for item in result] == [
+        ("https://mk4s.ru/p/1", Decimal("1500.50"), "Sheet"),
+        ("https://mk4s.ru/p/2", Decimal("2300"), "Profile"),
+    ]